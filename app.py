@@ -6,30 +6,30 @@ from steps.step1_generate_rubric import run_step1
 from steps.step2_random_grading import run_step2
 from steps.step3_feedback_update import run_step3
 from steps.step4_batch_grading import run_step4
-from langchain.memory import ConversationSummaryMemory
-from config.llm_config import get_llm
+from utils.rubric_store import RubricStore
+from utils.session_store import MissingBlobError
 
 # 페이지 설정
 st.set_page_config(page_title="AI 채점 시스템", layout="wide")
 st.title("🎓 AI 기반 자동 채점 시스템 - by DPT")
 
-# LLM 및 메모리 초기화
-llm = get_llm()
-
+# 세션 상태 초기화
 def initialize_session_state():
     defaults = {
-        "rubric_memory": ConversationSummaryMemory(llm=llm, memory_key="history", return_messages=True),
+        "rubric_store": RubricStore(),  # 채점 기준 버전 저장소 (생성/수정 이력)
+        "grading_cache": {},            # (채점 기준 버전, 답안 키) → 채점 결과
         "step": 1,
-        "generated_rubrics": {},
         "problem_text": None,
         "problem_filename": None,
         "student_answers_data": [],
         "feedback_text": "",
-        "modified_rubrics": {},
         "last_grading_result": None,
         "last_selected_student": None,
         "all_grading_results": [],
-        "highlighted_results": []
+        "highlighted_results": [],
+        "grading_mode": None,           # STEP 4 채점 방식 (cascade/묶음 채점), 사전 채점도 같은 설정 사용
+        "speculative_grading": False,
+        "speculative_job": None
     }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -49,6 +49,12 @@ with st.sidebar:
     if st.button("4️⃣ 전체 학생 일괄 채점"):
         st.session_state.step = 4
 
+    st.session_state.speculative_grading = st.checkbox(
+        "🔮 채점 기준 저장 시 백그라운드 사전 채점",
+        value=st.session_state.speculative_grading,
+        help="STEP 3에서 피드백으로 채점 기준이 수정될 때마다 전체 학생을 미리 채점해 두고, STEP 4에서 끝난 결과를 바로 사용합니다.",
+    )
+
     st.markdown("### 📝 교수자 피드백")
     feedback = st.text_area("채점 기준 수정 피드백", value=st.session_state.feedback_text, key="sidebar_feedback")
     st.session_state.feedback_text = feedback
@@ -70,11 +76,19 @@ with st.sidebar:
 
 
 # STEP 실행 흐름
-if st.session_state.step == 1:
-    run_step1()
-elif st.session_state.step == 2:
-    run_step2()
-elif st.session_state.step == 3:
-    run_step3()
-elif st.session_state.step == 4:
-    run_step4()
+try:
+    if st.session_state.step == 1:
+        run_step1()
+    elif st.session_state.step == 2:
+        run_step2()
+    elif st.session_state.step == 3:
+        run_step3()
+    elif st.session_state.step == 4:
+        run_step4()
+except MissingBlobError:
+    # 저장소에서 답안/채점 결과 파일이 사라진 경우: 깨진 레코드를 비우고 다시 업로드하도록 안내
+    for key in ("student_answers_data", "highlighted_results", "previous_highlighted_results"):
+        st.session_state[key] = []
+    st.session_state.grading_cache = {}
+    st.session_state.ingest_key = None
+    st.error("⚠️ 저장된 학생 답안 데이터를 찾을 수 없습니다. STEP 2에서 학생 답안을 다시 업로드해주세요.")
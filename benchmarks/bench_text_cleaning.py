@@ -0,0 +1,90 @@
+# bench_text_cleaning.py
+# 답안 텍스트 정리 속도(줄/초)를 측정하는 마이크로 벤치마크입니다.
+# 이전 방식(전체 텍스트를 모아 줄마다 컴파일되지 않은 정규식 2회 검사)과
+# 페이지 스트리밍 방식(clean_pages, 반복 머리글 감지 포함)을 같은 합성 답안으로 비교합니다.
+# 측정 전에 두 방식의 결과가 같은지 먼저 확인합니다.
+#
+# 실행: python benchmarks/bench_text_cleaning.py [학생 수] [학생당 페이지 수]
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_cleaning import clean_pages, DEFAULT_COURSE_SKIP_PATTERNS  # noqa: E402
+
+# 합성 답안의 머리글은 기존 과목 머리글이므로 [cleaning] skip_patterns 기본값을 그대로 사용
+COURSE = DEFAULT_COURSE_SKIP_PATTERNS
+
+WORDS = "텍스트 전처리 토크나이징 불용어 제거 모델 입력 절차 구성 평가 지표 정확도 재현율 데이터".split()
+
+
+def make_pages(rng, n_pages, lines_per_page=40):
+    pages = []
+    for p in range(1, n_pages + 1):
+        lines = ["DIGB226 Final Take-Home Exam", "202312345 김채점"]
+        for i in range(lines_per_page):
+            if i % 10 == 0:
+                lines.append("")
+                lines.append(f"{i // 10 + 1}. " + " ".join(rng.choices(WORDS, k=4)))
+            else:
+                lines.append(" ".join(rng.choices(WORDS, k=rng.randint(5, 15))))
+        lines.append(f"- {p} -")
+        pages.append("\n".join(lines))
+    return pages
+
+
+def legacy_clean(text):
+    # 변경 전 clean_text_postprocess 구현 (비교용)
+    lines = text.split('\n')
+    cleaned = []
+    prev_blank = True
+    for line in lines:
+        line = line.strip()
+        if re.search(r'DIGB226|Final Take-Home Exam|^\s*-\s*\d+\s*-$', line):
+            continue
+        if re.search(r'^\d{9,10}\s*[가-힣]+$', line):
+            continue
+        if not line:
+            prev_blank = True
+            continue
+        if prev_blank:
+            cleaned.append("")
+        cleaned.append(line)
+        prev_blank = False
+    return "\n".join(cleaned)
+
+
+def bench(label, fn, documents, total_lines):
+    start = time.perf_counter()
+    for pages in documents:
+        fn(pages)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.3f}s  {total_lines / elapsed:>12,.0f} lines/s")
+
+
+def main():
+    n_students = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    rng = random.Random(0)
+    documents = [make_pages(rng, n_pages) for _ in range(n_students)]
+    total_lines = sum(page.count("\n") + 1 for pages in documents for page in pages)
+    print(f"학생 {n_students}명 × {n_pages}페이지, 총 {total_lines:,}줄")
+
+    # 두 방식의 정리 결과가 같아야 속도 비교가 의미 있음
+    for pages in documents:
+        expected = legacy_clean("\n".join(pages).strip())
+        assert clean_pages(iter(pages), COURSE) == expected, "clean_pages 결과가 이전 방식과 다릅니다."
+        assert clean_pages(iter(pages), COURSE, detect_repeated=False) == expected, "clean_pages 결과가 이전 방식과 다릅니다."
+
+    bench("legacy (join + clean)", lambda pages: legacy_clean("\n".join(pages).strip()), documents, total_lines)
+    bench("clean_pages (streaming)", lambda pages: clean_pages(iter(pages), COURSE), documents, total_lines)
+    bench("clean_pages (no repeat)", lambda pages: clean_pages(iter(pages), COURSE, detect_repeated=False),
+          documents, total_lines)
+
+
+if __name__ == "__main__":
+    main()
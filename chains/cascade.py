@@ -0,0 +1,217 @@
+# cascade.py
+# 이 파일은 STEP 4 일괄 채점용 모델 cascade 입니다.
+# 작은 모델이 먼저 채점하고, 아래 경우에만 큰 모델로 다시 채점합니다.
+#   1) 채점 결과 형식 검증 실패 (총점/항목 표 누락, 배점 초과 등)
+#   2) 총점이 등급 경계 근처
+#   3) 빠른 2차 모델의 총점과 차이가 큼
+# 모델(tier)별 호출 수, 지연 시간, 토큰 사용량, 재채점 비율을 함께 집계합니다.
+
+import math
+import time
+import threading
+
+from config.llm_config import get_llm, get_cascade_config
+from chains.grading_chain import prompt_template
+from utils.score_utils import extract_total_score
+from utils.results_table import parse_grading_rows
+
+
+def _token_usage(response):
+    """
+    LangChain 응답 메시지에서 (입력 토큰, 출력 토큰)을 꺼냅니다.
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def validate_grading(grading_text):
+    """
+    채점 결과가 후처리 가능한 형식인지 검사하고 (통과 여부, 사유, 총점)을 반환합니다.
+    """
+    if not grading_text or grading_text.startswith("[오류]"):
+        return False, "응답 오류", None
+    total = extract_total_score(grading_text)
+    if total is None:
+        return False, "총점 누락", None
+    rows = parse_grading_rows(grading_text)
+    if not rows:
+        return False, "항목 표 누락", total
+    max_sum = 0.0
+    for _, _, max_points, awarded in rows:
+        if math.isnan(max_points):
+            continue
+        if awarded > max_points:
+            return False, "항목 배점 초과", total
+        max_sum += max_points
+    if total > max_sum + 1e-6:
+        return False, "총점 배점 초과", total
+    return True, "", total
+
+
+class TierMetrics:
+    """
+    모델 한 단계(tier)의 누적 호출 통계
+    """
+    __slots__ = ("model", "calls", "latency", "input_tokens", "output_tokens")
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+        self.latency = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+
+class GradingCascade:
+    """
+    작은 모델 → (필요 시) 큰 모델 순서로 채점하는 채점기.
+    cascade 를 끄면 큰 모델로만 채점하므로 기존 동작과 같습니다.
+    여러 스레드에서 동시에 호출해도 통계가 섞이지 않도록 잠금을 사용합니다.
+    """
+
+    def __init__(self, config=None, enabled=None):
+        self.config = dict(config or get_cascade_config())
+        self.enabled = self.config["cascade"] if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._chains = {}
+        self.metrics = {}
+        self.graded = 0
+        self.escalations = {}
+        # 모델 객체는 생성 시점(스크립트 스레드)에 미리 만들어 두어 백그라운드 스레드에서도 바로 쓸 수 있게 함
+        tiers = ["strong"]
+        if self.enabled:
+            tiers.append("fast")
+            if self.config["second_opinion"]:
+                tiers.append("second_opinion")
+        for tier in tiers:
+            self._chain(tier)
+
+    def _chain(self, tier):
+        # 단일 채점(grade_answer)과 같은 시스템 메시지 프롬프트를 거쳐 호출
+        if tier not in self._chains:
+            self._chains[tier] = prompt_template | get_llm(self.config[f"{tier}_model"])
+            self.metrics[tier] = TierMetrics(self.config[f"{tier}_model"])
+        return self._chains[tier]
+
+    def invoke(self, tier, prompt):
+        """
+        지정한 tier 모델을 호출하고 응답 텍스트를 반환합니다. (실패 시 "[오류]" 문자열)
+        """
+        with self._lock:
+            chain = self._chain(tier)
+        start = time.perf_counter()
+        try:
+            response = chain.invoke({"input": prompt})
+            content = str(getattr(response, "content", "") or "")
+            input_tokens, output_tokens = _token_usage(response)
+            if not content:
+                content = "[오류] GPT 응답이 비어 있습니다."
+        except Exception as e:
+            content = f"[오류] GPT 호출 실패: {str(e)}"
+            input_tokens = output_tokens = 0
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            m = self.metrics[tier]
+            m.calls += 1
+            m.latency += elapsed
+            m.input_tokens += input_tokens
+            m.output_tokens += output_tokens
+        return content
+
+    @property
+    def first_tier(self):
+        return "fast" if self.enabled else "strong"
+
+    @property
+    def uses_second_opinion(self):
+        return self.enabled and self.config["second_opinion"]
+
+    def _near_boundary(self, total):
+        margin = self.config["boundary_margin"]
+        return any(abs(total - b) <= margin for b in self.config["grade_boundaries"])
+
+    def escalation_reason(self, prompt, grading_text, second_opinion=None):
+        """
+        1차 채점 결과를 큰 모델로 다시 채점해야 하는 사유를 반환합니다. (필요 없으면 "")
+        second_opinion 에 묶음 채점으로 이미 받은 2차 결과를 넘기면 2차 모델을 따로 호출하지 않습니다.
+        """
+        ok, reason, total = validate_grading(grading_text)
+        if not ok:
+            return reason
+        if self._near_boundary(total):
+            return "등급 경계 근처"
+        if self.uses_second_opinion:
+            if second_opinion is None:
+                second_opinion = self.invoke("second_opinion", prompt)
+            second_total = extract_total_score(second_opinion)
+            if second_total is None or abs(second_total - total) > self.config["agreement_tolerance"]:
+                return "2차 의견 불일치"
+        return ""
+
+    def grade(self, prompt, first_pass=None, second_opinion=None):
+        """
+        학생 한 명의 채점 프롬프트를 cascade 로 채점하고 채점 결과 텍스트를 반환합니다.
+        first_pass 에 묶음 채점 등으로 이미 얻은 1차 결과를 넘기면 1차 호출을 생략하고 검증부터 진행합니다.
+        (second_opinion 도 같은 방식으로 2차 모델 호출을 생략합니다.)
+        """
+        if first_pass is not None and not self.enabled:
+            # 큰 모델로 이미 채점된 결과는 형식 검증만 통과하면 그대로 사용
+            result = first_pass if validate_grading(first_pass)[0] else self.invoke("strong", prompt)
+        elif not self.enabled:
+            result = self.invoke("strong", prompt)
+        else:
+            result = first_pass if first_pass is not None else self.invoke("fast", prompt)
+            reason = self.escalation_reason(prompt, result, second_opinion)
+            if reason:
+                with self._lock:
+                    self.escalations[reason] = self.escalations.get(reason, 0) + 1
+                result = self.invoke("strong", prompt)
+        with self._lock:
+            self.graded += 1
+        return result
+
+    def merge(self, other):
+        """
+        다른 채점기(백그라운드 사전 채점 등)의 tier 별 호출 통계, 채점 수, 재채점 사유를 합칩니다.
+        """
+        with other._lock:
+            metrics = [(tier, m.model, m.calls, m.latency, m.input_tokens, m.output_tokens)
+                       for tier, m in other.metrics.items()]
+            graded, escalations = other.graded, dict(other.escalations)
+        with self._lock:
+            for tier, model, calls, latency, input_tokens, output_tokens in metrics:
+                m = self.metrics.setdefault(tier, TierMetrics(model))
+                m.calls += calls
+                m.latency += latency
+                m.input_tokens += input_tokens
+                m.output_tokens += output_tokens
+            self.graded += graded
+            for reason, count in escalations.items():
+                self.escalations[reason] = self.escalations.get(reason, 0) + count
+
+    def report(self):
+        """
+        tier 별 통계 표 (화면 출력용 dict 목록)
+        """
+        with self._lock:
+            rows = []
+            for tier, m in self.metrics.items():
+                rows.append({
+                    "단계": tier,
+                    "모델": m.model,
+                    "호출 수": m.calls,
+                    "평균 지연(초)": round(m.latency / m.calls, 2) if m.calls else 0,
+                    "입력 토큰": m.input_tokens,
+                    "출력 토큰": m.output_tokens,
+                })
+            return rows
+
+    def escalation_rate(self):
+        with self._lock:
+            if not self.graded:
+                return 0.0
+            return sum(self.escalations.values()) / self.graded
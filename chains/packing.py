@@ -0,0 +1,99 @@
+# packing.py
+# 이 파일은 짧은 답안 시험에서 여러 학생의 답안을 한 번의 GPT 요청으로 묶어 채점하는 기능입니다.
+# 채점 기준과 지침은 요청마다 한 번만 보내고, 학생별 결과는 구분자로 나눠 받은 뒤 다시 분리합니다.
+
+import re
+from functools import lru_cache
+
+# 학생 한 명당 예상 출력 토큰 (채점 표 + 근거 문장)
+OUTPUT_TOKENS_PER_STUDENT = 700
+
+_RESULT_RE = re.compile(r'<<<학생\s*(\d+)>>>\s*([\s\S]*?)\s*<<<끝\s*\1>>>')
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def estimate_tokens(text):
+    """
+    텍스트의 토큰 수를 추정합니다. (tiktoken 이 없으면 한글 기준 대략 글자 수의 절반)
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 2 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def pack_students(students, token_budget, max_per_pack=8, base_tokens=0):
+    """
+    학생 목록을 요청 하나당 토큰 예산(입력 답안 + 예상 출력)을 넘지 않도록 순서대로 묶습니다.
+    예산을 혼자 넘는 긴 답안은 한 명짜리 묶음이 됩니다.
+    """
+    packs, current, used = [], [], base_tokens
+    for student in students:
+        cost = estimate_tokens(student["text"]) + OUTPUT_TOKENS_PER_STUDENT
+        if current and (used + cost > token_budget or len(current) >= max_per_pack):
+            packs.append(current)
+            current, used = [], base_tokens
+        current.append(student)
+        used += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_prompt(rubric_text, students, instructions):
+    """
+    여러 학생의 답안을 한 번에 채점하는 프롬프트를 만듭니다.
+    instructions 는 단일 학생 채점과 동일한 출력 형식/채점 지침 블록입니다.
+    """
+    answers = "\n\n".join(
+        f"===== 학생 {k}: {s['name']} ({s['id']}) =====\n{s['text']}"
+        for k, s in enumerate(students, start=1)
+    )
+    return f"""
+당신은 대학 시험을 채점하는 GPT 채점자입니다.
+
+당신의 역할은, 사람이 작성한 "채점 기준"에 **엄격하게 따라** 학생의 답안을 채점하는 것입니다.
+**창의적인 해석이나 기준 변경 없이**, 각 항목에 대해 **정확한 근거와 함께 점수를 부여**해야 합니다.
+아래에는 {len(students)}명의 학생 답안이 있습니다. 각 학생을 **서로 독립적으로** 채점하세요.
+
+---
+
+📌 채점 기준:
+{rubric_text}
+
+📌 학생 답안:
+{answers}
+
+---
+{instructions}
+
+📌 묶음 출력 형식
+학생마다 위 형식의 채점 결과 전체를 아래 구분자 사이에 작성하세요. 번호는 위 학생 번호와 같아야 하며, 학생을 빠뜨리지 마세요.
+<<<학생 1>>>
+(학생 1의 채점 결과)
+<<<끝 1>>>
+<<<학생 2>>>
+(학생 2의 채점 결과)
+<<<끝 2>>>
+"""
+
+
+def split_packed_result(grading_text, count):
+    """
+    묶음 채점 결과를 학생 번호(1부터) → 채점 결과 텍스트 dict 로 나눕니다.
+    구분자가 없거나 깨진 학생은 결과에 포함되지 않습니다.
+    """
+    sections = {}
+    for match in _RESULT_RE.finditer(grading_text or ""):
+        k = int(match.group(1))
+        if 1 <= k <= count and k not in sections:
+            sections[k] = match.group(2)
+    return sections
@@ -0,0 +1,98 @@
+# speculative.py
+# 이 파일은 STEP 3에서 채점 기준이 저장될 때마다 전체 학생을 백그라운드에서 미리 채점하는 작업 관리자입니다.
+# - 프로세스 전체가 공유하는 작은 스레드 풀에서 낮은 우선순위로 학생(묶음 채점이면 묶음) 단위 작업을 실행합니다.
+# - 채점 기준이 다시 바뀌면 이전 버전의 대기 중인 작업은 취소됩니다.
+# - STEP 4는 같은 채점 방식(cascade/묶음 채점)으로 끝난 결과를 가져가고 나머지만 직접 채점합니다.
+# 백그라운드 스레드에서는 st.session_state 에 접근하지 않고, 결과는 작업 객체 안에만 보관합니다.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+SPECULATIVE_WORKERS = int(os.environ.get("DPT_SPECULATIVE_WORKERS", "2"))
+
+
+def _lower_thread_priority():
+    # 리눅스에서는 스레드 단위로 nice 값을 올려 화면 응답(재실행)보다 뒤로 밀리게 함
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=SPECULATIVE_WORKERS,
+    thread_name_prefix="speculative-grading",
+    initializer=_lower_thread_priority,
+)
+
+
+class SpeculativeJob:
+    """
+    채점 기준 한 버전에 대한 백그라운드 사전 채점 작업.
+    batches 는 한 번에 채점할 학생 묶음 목록이고(단일 채점이면 한 명씩),
+    grade_fn(batch) 는 묶음을 채점해 {결과 캐시 키: 결과} 를 반환합니다.
+    mode 는 채점 방식(cascade/묶음 채점 여부)으로, STEP 4 설정과 같을 때만 결과를 사용합니다.
+    grader 는 grade_fn 이 사용하는 채점기로, STEP 4가 결과를 가져갈 때 호출 통계를 함께 합칩니다.
+    """
+
+    def __init__(self, rubric_hash, batches, grade_fn, mode="", grader=None):
+        self.rubric_hash = rubric_hash
+        self.mode = mode
+        self.grader = grader
+        self.total = sum(len(batch) for batch in batches)
+        self.failed = 0
+        self._results = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._futures = [
+            _executor.submit(self._run, batch, grade_fn) for batch in batches
+        ]
+
+    def _run(self, batch, grade_fn):
+        if self._cancelled.is_set():
+            return
+        try:
+            results = grade_fn(batch)
+        except Exception:
+            with self._lock:
+                self.failed += len(batch)
+            return
+        # 응답을 기다리는 동안 취소되었다면 오래된 버전의 결과이므로 버림
+        if not self._cancelled.is_set():
+            with self._lock:
+                self._results.update(results)
+
+    @property
+    def completed(self):
+        with self._lock:
+            return len(self._results)
+
+    def cancel(self):
+        """
+        아직 시작하지 않은 작업을 취소합니다. (실행 중인 GPT 호출 결과는 버려짐)
+        """
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+    def finish(self):
+        """
+        대기 중인 작업은 취소하고, 이미 실행 중인 작업은 끝날 때까지 기다린 뒤 결과를 반환합니다.
+        """
+        for future in self._futures:
+            future.cancel()
+        for future in self._futures:
+            try:
+                future.result()
+            except CancelledError:
+                pass
+        self._cancelled.set()
+        return self.harvest()
+
+    def harvest(self):
+        """
+        지금까지 끝난 결과 (캐시 키 → 결과)
+        """
+        with self._lock:
+            return dict(self._results)
@@ -1,16 +1,52 @@
 # llm_config.py
 # 이 파일은 GPT (OpenAI 기반 LLM)를 초기화하는 함수입니다.
 # API 키는 streamlit의 secrets 기능을 통해 안전하게 불러옵니다.
+# 모델 이름과 채점 cascade 설정은 secrets 의 [llm] 섹션으로 바꿀 수 있습니다.
+#
+# [llm]
+# model = "gpt-4.1"                  # 채점 기준 생성/수정 및 최종 판정 모델
+# fast_model = "gpt-4.1-mini"        # cascade 1차 채점 모델
+# second_opinion_model = "gpt-4.1-nano"
+# cascade = true
 
 from langchain.chat_models import ChatOpenAI
 import streamlit as st
 
-def get_llm():
+DEFAULT_MODEL = "gpt-4.1"
+
+CASCADE_DEFAULTS = {
+    "cascade": False,
+    "fast_model": "gpt-4.1-mini",
+    "second_opinion": True,
+    "second_opinion_model": "gpt-4.1-nano",
+    "agreement_tolerance": 1.0,   # 두 모델 총점 차이가 이 값을 넘으면 상위 모델로 재채점
+    "boundary_margin": 0.5,       # 등급 경계 ± 이 범위 안의 총점은 상위 모델로 재채점
+    "grade_boundaries": [],       # 예: [18, 21, 24, 27]
+}
+
+
+def _llm_settings():
+    return st.secrets.get("llm", {})
+
+
+def get_llm(model_name: str = None):
     """
-    GPT 모델 객체를 반환합니다. 기본 모델은 'gpt-4.1-mini'이며, 온도는 0으로 설정되어 있습니다.
+    GPT 모델 객체를 반환합니다. 기본 모델은 'gpt-4.1'(secrets 의 llm.model 로 변경 가능)이며, 온도는 0으로 설정되어 있습니다.
     """
     return ChatOpenAI(
         openai_api_key=st.secrets["openai"]["API_KEY"],
-        model_name="gpt-4.1",
+        # OpenAI 호환 엔드포인트(프록시, 부하 테스트용 가짜 서버 등)를 쓸 때만 BASE_URL 지정
+        openai_api_base=st.secrets["openai"].get("BASE_URL"),
+        model_name=model_name or _llm_settings().get("model", DEFAULT_MODEL),
         temperature=0
     )
+
+
+def get_cascade_config() -> dict:
+    """
+    채점 cascade 설정 (secrets 의 [llm] 값이 기본값을 덮어씀)
+    """
+    settings = _llm_settings()
+    config = {key: settings.get(key, default) for key, default in CASCADE_DEFAULTS.items()}
+    config["strong_model"] = settings.get("model", DEFAULT_MODEL)
+    return config
@@ -0,0 +1,104 @@
+# fake_openai.py
+# 부하 테스트용 로컬 가짜 OpenAI 엔드포인트입니다. (/v1/chat/completions 만 지원)
+# 요청마다 설정한 지연 시간만큼 기다린 뒤, 채점 결과 형식(항목 표 + 총점)의 응답을 돌려줍니다.
+# 묶음 채점 요청에는 학생별 구분자(<<<학생 k>>> ... <<<끝 k>>>)로 감싼 결과를 돌려줍니다.
+#
+# 단독 실행: python loadtest/fake_openai.py --port 8765 --latency 0.5
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PACKED_RE = re.compile(r'===== 학생 (\d+):')
+
+GRADING_TEMPLATE = """### 문제 1 (4점)
+| 채점 항목 | 배점 | 부여 점수 | 평가 근거 |
+|---|---|---|---|
+| 핵심 개념 설명 | 2점 | {a}점 | "핵심 개념을 언급함" |
+| 예시 제시 | 2점 | {b}점 | "예시가 구체적임" |
+
+**근거 문장**
+- 핵심 개념 설명: "텍스트 전처리는 토크나이징에서 시작한다"
+
+**총점: {total}점**
+"""
+
+
+def fake_grading(rng):
+    a, b = rng.choice([0, 1, 2]), rng.choice([0, 0.5, 1, 2])
+    return GRADING_TEMPLATE.format(a=a, b=b, total=a + b)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.5
+    jitter = 0.1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        request = json.loads(body or b"{}")
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        rng = random.Random(hash(prompt))
+
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+        packed = sorted({int(k) for k in _PACKED_RE.findall(prompt)})
+        if packed:
+            content = "\n".join(f"<<<학생 {k}>>>\n{fake_grading(rng)}\n<<<끝 {k}>>>" for k in packed)
+        else:
+            content = fake_grading(rng)
+
+        prompt_tokens, completion_tokens = len(prompt) // 2, len(content) // 2
+        response = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        payload = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_fake_openai(port=0, latency=0.5, jitter=0.1):
+    """
+    가짜 서버를 백그라운드 스레드에서 띄우고 (서버, base_url) 을 반환합니다.
+    """
+    handler = type("Handler", (FakeOpenAIHandler,), {"latency": latency, "jitter": jitter})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 가짜 OpenAI 엔드포인트")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="지연 편차(초)")
+    args = parser.parse_args()
+    server, url = start_fake_openai(args.port, args.latency, args.jitter)
+    print(f"fake OpenAI endpoint: {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,193 @@
+# run_loadtest.py
+# Streamlit AppTest 로 app.py 를 화면 없이 여러 세션 동시에 실행하는 부하 테스트입니다.
+# 세션마다: (업로드 결과를 세션에 직접 채움) → STEP 2 무작위 채점 → STEP 4 전체 채점 을 진행하고,
+# GPT 호출은 로컬 가짜 OpenAI 엔드포인트(fake_openai.py)로 보냅니다.
+#
+# 측정 범위 (결과 해석 시 주의):
+# - 실제 `streamlit run` 서버가 아니라, 세션마다 별도 프로세스에서 AppTest 로 스크립트를 재실행합니다.
+#   따라서 웹소켓/직렬화/서버 스레드 비용은 포함되지 않고, 메모리(힙 증가·최대 RSS)는 서버 전체가 아닌 세션 프로세스 하나의 값입니다.
+# - AppTest 는 file_uploader 조작을 지원하지 않으므로 업로드와 STEP 2 텍스트 추출(PDF 파싱·정리)은 건너뛰고,
+#   그 결과(StudentRecord)를 세션 상태에 직접 채웁니다. 추출 속도는 benchmarks/bench_text_cleaning.py 로 따로 측정합니다.
+# - 재실행 지연과 처리량은 같은 컨테이너의 CPU·가짜 GPT 서버를 함께 쓰므로 세션 간 경합은 반영됩니다.
+#
+# 실행: python loadtest/run_loadtest.py --sessions 1 2 4 8 --students 30 --latency 0.5
+# 결과: 세션 수별 재실행(rerun) 지연(p50/p95/최대), 세션 프로세스당 힙 증가·최대 RSS, 처리량(학생/초)
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+import resource
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 블롭 저장소는 실행마다 임시 폴더를 사용 (utils.session_store import 전에 설정, spawn 된 세션 프로세스는 환경변수를 물려받음)
+_OWN_BLOB_DIR = None
+if "DPT_BLOB_DIR" not in os.environ:
+    _OWN_BLOB_DIR = os.environ["DPT_BLOB_DIR"] = tempfile.mkdtemp(prefix="dpt_loadtest_")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from loadtest.fake_openai import start_fake_openai  # noqa: E402
+from utils.rubric_store import RubricStore  # noqa: E402
+from utils.session_store import StudentRecord  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+
+RUBRIC = """문제 1 (4점)
+| 채점 항목 | 배점 | 세부 기준 |
+|---|---|---|
+| 핵심 개념 설명 | 2점 | 정의를 정확히 서술 |
+| 예시 제시 | 2점 | 구체적 예시 1개 이상 |
+**배점 총합: 4점**
+→ 전체 배점 총합: 4점
+"""
+
+
+def make_students(session_no, n_students):
+    """
+    세션 하나가 업로드·추출을 마친 것과 같은 상태 (디스크 저장소의 답안 텍스트를 가리키는 학생 레코드)
+    실제 PDF 파싱·정리는 거치지 않습니다.
+    """
+    records = []
+    for i in range(n_students):
+        sid = f"2024{session_no:02d}{i:04d}"
+        lines = [f"1. Answer of student {sid}", "Tokenizing splits text into tokens.",
+                 "Stopword removal drops frequent words.", "Example: the, a, an are removed."]
+        records.append(StudentRecord(f"Student{i}", sid, f"Assignment_{sid}_Student{i}.pdf", "\n".join(lines)))
+    return records
+
+
+def click(at, label, timeout):
+    next(b for b in at.button if b.label == label).click()
+    return timed_run(at, timeout)
+
+
+def timed_run(at, timeout):
+    start = time.perf_counter()
+    at.run(timeout=timeout)
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"app exception: {at.exception[0].message}")
+    return elapsed
+
+
+_start_barrier = None
+
+
+def _init_worker(barrier):
+    global _start_barrier
+    _start_barrier = barrier
+
+
+def run_session(session_no, base_url, n_students, timeout):
+    """
+    세션 하나의 흐름을 실행하고 재실행 지연, 세션 상태 메모리, 시작/종료 시각을 반환합니다.
+    """
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.secrets["openai"] = {"API_KEY": "sk-fake", "BASE_URL": base_url}
+    at.run(timeout=timeout)  # 모듈 import 등 예열 (측정 제외)
+
+    # 모든 세션이 예열을 마친 뒤 동시에 시작
+    _start_barrier.wait()
+    started = time.time()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    latencies = [timed_run(at, timeout)]  # 첫 화면 (STEP 1)
+
+    # STEP 1 결과 + STEP 2 업로드·추출 결과를 세션에 직접 채움 (업로드/추출 단계는 측정하지 않음)
+    store = RubricStore()
+    store.commit("rubric_exam.pdf", RUBRIC, source="생성", parent=False)
+    records = make_students(session_no, n_students)
+    at.session_state["problem_text"] = "1. Explain text preprocessing. (4 points)"
+    at.session_state["problem_filename"] = "exam.pdf"
+    at.session_state["rubric_store"] = store
+    at.session_state["student_answers_data"] = records
+
+    at.session_state["step"] = 2
+    latencies.append(timed_run(at, timeout))
+    latencies.append(click(at, "📌 무작위 채점", timeout))
+
+    at.session_state["step"] = 4
+    latencies.append(timed_run(at, timeout))
+    latencies.append(click(at, "📝 전체 학생 채점 실행", timeout))
+    graded = len(at.session_state["highlighted_results"])
+    if graded != n_students:
+        raise RuntimeError(f"session {session_no}: graded {graded}/{n_students}")
+
+    # 세션 상태가 살아 있는 동안(AppTest 참조 유지) 측정한 Python 힙 증가분
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return {
+        "latencies": latencies,
+        "retained": retained,
+        "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "started": started,
+        "finished": time.time(),
+    }
+
+
+def run_level(n_sessions, base_url, n_students, timeout):
+    """
+    n_sessions 개의 세션을 동시에 실행합니다.
+    AppTest 는 secrets/런타임 등 프로세스 전역 상태를 바꾸며 실행되므로 한 프로세스에서 동시에 돌릴 수 없어,
+    세션마다 별도 프로세스를 띄우고 예열 후 배리어로 동시에 출발시킵니다.
+    (같은 컨테이너의 CPU·가짜 GPT 서버를 공유하므로 세션 간 경합은 반영되지만, 실제 서버의 웹소켓·스레드 비용은 포함되지 않습니다.)
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(n_sessions)
+    with ProcessPoolExecutor(max_workers=n_sessions, mp_context=ctx,
+                             initializer=_init_worker, initargs=(barrier,)) as pool:
+        futures = [pool.submit(run_session, k, base_url, n_students, timeout) for k in range(n_sessions)]
+        outcomes = [f.result() for f in futures]
+
+    wall = max(o["finished"] for o in outcomes) - min(o["started"] for o in outcomes)
+    latencies = sorted(l for o in outcomes for l in o["latencies"])
+    return {
+        "sessions": n_sessions,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "max": latencies[-1],
+        "mem_per_session_kb": statistics.mean(o["retained"] for o in outcomes) / 1024,
+        "rss_mb": max(o["max_rss"] for o in outcomes) / 1024 / 1024,
+        "throughput": n_sessions * n_students / wall,
+        "wall": wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 다중 세션 부하 테스트")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8], help="동시 세션 수 목록")
+    parser.add_argument("--students", type=int, default=20, help="세션당 학생 수")
+    parser.add_argument("--latency", type=float, default=0.5, help="가짜 GPT 응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="가짜 GPT 응답 지연 편차(초)")
+    parser.add_argument("--timeout", type=float, default=600, help="재실행 1회 제한 시간(초)")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_openai(latency=args.latency, jitter=args.jitter)
+    print(f"fake OpenAI: {base_url} (latency {args.latency}s ± {args.jitter}s), 세션당 학생 {args.students}명")
+    print("※ 세션마다 별도 프로세스의 AppTest 로 실행 (streamlit 서버·웹소켓 미포함), "
+          "메모리는 세션 프로세스 하나 기준, 업로드/STEP 2 텍스트 추출은 건너뜀")
+    print(f"{'세션':>4} {'p50(s)':>8} {'p95(s)':>8} {'max(s)':>8} {'프로세스 힙 증가(KB)':>14} "
+          f"{'프로세스 최대 RSS(MB)':>16} {'학생/초':>8} {'총 시간(s)':>10}")
+    try:
+        for n in args.sessions:
+            r = run_level(n, base_url, args.students, args.timeout)
+            print(f"{r['sessions']:>4} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['max']:>8.2f} "
+                  f"{r['mem_per_session_kb']:>14.0f} {r['rss_mb']:>16.0f} {r['throughput']:>8.2f} {r['wall']:>10.2f}")
+    finally:
+        server.shutdown()
+        if _OWN_BLOB_DIR:
+            shutil.rmtree(_OWN_BLOB_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
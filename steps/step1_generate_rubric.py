@@ -93,32 +93,29 @@ def run_step1():
             else:
                 st.write(text)
                 
-            if rubric_key not in st.session_state.generated_rubrics:
+            store = st.session_state.rubric_store
+            if store.head(rubric_key) is None:
                 if st.button("📐 채점 기준 생성"):
-                    if not hasattr(st.session_state, 'rubric_memory'):
-                        st.session_state.rubric_memory = {}
-                    st.session_state.rubric_memory.clear()
-                    
                     with st.spinner("프로그램이 채점 기준을 생성 중입니다..."):
                         result = generate_rubric(text)
-                        st.session_state.generated_rubrics[rubric_key] = result
-                        st.success("✅ 채점 기준 생성 완료")
+                        if not result.startswith("[오류]"):
+                            store.commit(rubric_key, result, source="생성", parent=False)
+                            st.success("✅ 채점 기준 생성 완료")
             else:
                 if st.button("📐 채점 기준 재생성"):
                     confirm = st.checkbox("⚠️ 이미 생성된 채점 기준이 있습니다. 재생성하시겠습니까?")
                     if confirm:
-                        if not hasattr(st.session_state, 'rubric_memory'):
-                            st.session_state.rubric_memory = {}
-                        st.session_state.rubric_memory.clear()
-                        
                         with st.spinner("프로그램이 채점 기준을 재생성 중입니다..."):
                             result = generate_rubric(text)
-                            st.session_state.generated_rubrics[rubric_key] = result
-                            st.success("✅ 채점 기준 재생성 완료")
+                            if not result.startswith("[오류]"):
+                                # 재생성은 새 이력의 시작 (이전 버전은 해시로 계속 조회 가능)
+                                store.commit(rubric_key, result, source="재생성", parent=False)
+                                st.success("✅ 채점 기준 재생성 완료")
                             
-            if rubric_key in st.session_state.generated_rubrics:
-                st.subheader("📊 채점 기준")
-                st.markdown(st.session_state.generated_rubrics[rubric_key])
+            current = store.head(rubric_key)
+            if current:
+                st.subheader(f"📊 채점 기준 (버전 `{current.hash}`)")
+                st.markdown(current.text)
                 
         except Exception as e:
             st.error(f"파일 처리 중 오류가 발생했습니다: {str(e)}")
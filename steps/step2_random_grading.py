@@ -1,47 +1,17 @@
 import streamlit as st
 import io
 import re
-import tempfile
-import os
-import uuid
+import zipfile
 import urllib.parse
 
-from utils.pdf_utils import extract_text_from_pdf
-from utils.text_cleaning import clean_text_postprocess
+from utils.pdf_utils import iter_pdf_pages
+from utils.text_cleaning import clean_pages, DEFAULT_COURSE_SKIP_PATTERNS
 from utils.file_info import extract_info_from_filename, sanitize_filename
+from utils.session_store import StudentRecord
+from utils.zip_ingest import iter_zip_pdfs, load_roster, match_report
 from config.llm_config import get_llm
 
 
-def save_uploaded_file(uploaded_file):
-    """
-    업로드된 파일을 안전한 임시경로에 저장하고 경로 반환
-    """
-    try:
-        # 원본 파일명 디코딩
-        original_filename = urllib.parse.unquote(uploaded_file.name)
-        
-        # 파일 식별을 위해 원본 파일명은 유지하지만 안전하게 처리
-        safe_filename = sanitize_filename(original_filename)
-        
-        # 임시 파일 경로에는 UUID를 사용하여 충돌 방지
-        temp_filename = f"upload_{uuid.uuid4().hex}.pdf"
-        
-        # 임시 디렉토리에 파일 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", mode='wb') as tmp_file:
-            # getbuffer() 사용하여 파일 읽기
-            uploaded_file.seek(0)  # 파일 포인터 초기화
-            tmp_file.write(uploaded_file.getbuffer())
-            return tmp_file.name, safe_filename  # 경로와 안전한 파일명 반환
-    except Exception as e:
-        st.error(f"파일 저장 중 오류 발생: {str(e)}")
-        # 오류 발생 시 기본값으로 대체
-        unique_name = f"{uuid.uuid4().hex}.pdf"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", mode='wb') as tmp_file:
-            uploaded_file.seek(0)  # 파일 포인터 초기화
-            tmp_file.write(uploaded_file.getbuffer())
-            return tmp_file.name, unique_name
-
-
 # ✅ GPT 직접 호출 함수
 def grade_answer(prompt: str) -> str:
     try:
@@ -55,37 +25,47 @@ def grade_answer(prompt: str) -> str:
         return f"[오류] GPT 호출 실패: {str(e)}"
 
 
-# ✅ 학생 PDF 처리 함수 (한글 파일명 포함 처리)
-def process_student_pdfs(pdf_files, save_session:bool = True):
+def _extract_students(entries, identify=None):
+    """
+    (파일명, PDF 바이트) 를 하나씩 받아 임시 파일 없이 바로 텍스트를 추출·정리합니다.
+    identify: 파일명 → (이름, 학번) 함수. 생략하면 파일명 규칙(extract_info_from_filename)을 사용합니다.
+    """
     answers, info = [], []
+    identify = identify or extract_info_from_filename
+    # 시험별 머리글(과목 코드, 시험명 등) 제거 패턴: secrets 의 [cleaning] skip_patterns (없으면 기존 과목 머리글)
+    skip_patterns = tuple(st.secrets.get("cleaning", {}).get("skip_patterns", DEFAULT_COURSE_SKIP_PATTERNS))
 
-    for file in pdf_files:
+    for filename, data in entries:
         try:
-            # 🔧 한글 파일명을 안전하게 저장
-            uploaded_path, safe_name = save_uploaded_file(file)
-            
-            # 원본 파일명에서 이름/학번 추출
-            name, sid = extract_info_from_filename(file.name)
-            
-            # 텍스트 추출 (업로드된 파일 경로 사용)
-            text = extract_text_from_pdf(uploaded_path)
-            text = clean_text_postprocess(text)
-            
-            # 임시 파일 삭제
-            try:
-                os.unlink(uploaded_path)
-            except:
-                pass  # 삭제 실패해도 계속 진행
+            # 🔧 한글 파일명을 안전하게 처리
+            safe_name = sanitize_filename(urllib.parse.unquote(filename))
+
+            # 원본 파일명(또는 학생 명단)에서 이름/학번 추출
+            name, sid = identify(filename)
+
+            # 페이지 단위로 추출하면서 바로 정리 (메모리의 PDF 바이트 사용)
+            text = clean_pages(iter_pdf_pages(data), skip_patterns)
 
             if len(text.strip()) > 20:
                 answers.append(text)
-                info.append({'name': name, 'id': sid, 'text': text, 'filename': safe_name})
+                # 답안 텍스트는 디스크 저장소에 한 번만 저장하고, 세션에는 키만 보관
+                info.append(StudentRecord(name, sid, safe_name, text))
             else:
                 st.warning(f"{safe_name}에서 충분한 텍스트를 추출하지 못했습니다.")
         except Exception as e:
-            st.error(f"{file.name} 처리 중 오류 발생: {str(e)}")
+            st.error(f"{filename} 처리 중 오류 발생: {str(e)}")
             st.exception(e)
             continue  # 오류가 발생해도 다른 파일 계속 처리
+    return answers, info
+
+
+# ✅ 학생 PDF 처리 함수 (한글 파일명 포함 처리)
+def process_student_pdfs(pdf_files, save_session:bool = True, identify=None):
+    """
+    업로드된 PDF 목록에서 학생 답안을 추출합니다. (PDF 원본은 저장하지 않고 추출한 텍스트만 보관)
+    identify: 파일명 → (이름, 학번) 함수. 생략하면 파일명 규칙(extract_info_from_filename)을 사용합니다.
+    """
+    answers, info = _extract_students(((f.name, bytes(f.getbuffer())) for f in pdf_files), identify)
 
     if not answers:
         return [], []
@@ -94,32 +74,115 @@ def process_student_pdfs(pdf_files, save_session:bool = True):
         st.session_state.student_answers_data = info
     return answers, info
 
+
+def ingest_zip(zip_file, identify=None):
+    """
+    ZIP 안의 PDF 를 항목 단위로 한 번씩만 읽어 바로 텍스트를 추출하고 (파일명 목록, 학생 레코드 목록)을 반환합니다.
+    PDF 원본은 추출 후 버려지고 저장소에는 답안 텍스트만 남습니다.
+    """
+    filenames = []
+
+    def entries():
+        for name, data in iter_zip_pdfs(zip_file):
+            filenames.append(name)
+            yield name, data
+
+    _, info = _extract_students(entries(), identify)
+    return filenames, info
+
+
+def upload_key(uploaded_file):
+    # 업로드 식별자(file_id) + 크기: 다시 올리지 않는 한 재실행마다 같으므로 내용을 해시하지 않아도 됨
+    return (uploaded_file.file_id, uploaded_file.size)
+
+
+def render_match_report(report):
+    """
+    ZIP 제출물 ↔ 학생 명단 매칭 결과 표시
+    """
+    st.markdown(f"**👥 명단 매칭:** {len(report['matched'])}명 매칭, "
+                f"미매칭 파일 {len(report['unmatched'])}개, 중복 제출 {len(report['duplicates'])}명, "
+                f"미제출 {len(report['missing'])}명")
+    if report["unmatched"]:
+        with st.expander("❓ 명단과 연결되지 않은 파일"):
+            for filename in report["unmatched"]:
+                st.markdown(f"- `{filename}`")
+    if report["duplicates"]:
+        with st.expander("⚠️ 중복 제출"):
+            for sid, files in report["duplicates"].items():
+                st.markdown(f"- **{sid}**: " + ", ".join(f"`{f}`" for f in files))
+    if report["missing"]:
+        with st.expander("📭 제출물이 없는 학생"):
+            for name, sid in report["missing"]:
+                st.markdown(f"- {name} ({sid})")
+
+
 def run_step2():
     st.subheader("📄 STEP 2: 학생 답안 업로드 및 첫 번째 답안 채점")
 
     # STEP 1에서 생성된 문제와 파일명이 있어야 진행 가능
     if st.session_state.get("problem_text") and st.session_state.get("problem_filename"):
         rubric_key = f"rubric_{st.session_state.problem_filename}"
-        rubric = st.session_state.generated_rubrics.get(rubric_key)
+        current = st.session_state.rubric_store.head(rubric_key)
+        rubric = current.text if current else None
 
         if rubric:
             st.markdown("#### 📊 채점 기준")
             st.markdown(rubric)
 
-        # 학생 PDF 업로드 UI
-        student_pdfs = st.file_uploader(
-        "📥 채점 기준 테스트 파일 업로드",
-        type="pdf",
-        accept_multiple_files=True,
-        key="student_pdfs_upload"
-        )
-        
-        if student_pdfs:
-            st.session_state.all_student_pdfs = student_pdfs
+        # 학생 PDF 업로드 UI (개별 PDF 또는 LMS에서 내려받은 ZIP)
+        upload_mode = st.radio("업로드 방식", ["PDF 파일", "LMS ZIP 파일"], horizontal=True)
+        roster_file = None
+        filenames = []
+        zip_file = None
+        ingest_key = None  # 업로드가 바뀌었을 때만 다시 추출하기 위한 키 (파일 내용은 읽지 않음)
+        if upload_mode == "PDF 파일":
+            student_pdfs = st.file_uploader(
+            "📥 채점 기준 테스트 파일 업로드",
+            type="pdf",
+            accept_multiple_files=True,
+            key="student_pdfs_upload"
+            )
+            # UploadedFile(원본 바이트 전체)은 세션에 두지 않고, 추출한 답안 텍스트만 저장소에 보관
+            student_pdfs = student_pdfs or []
+            if student_pdfs:
+                ingest_key = ("pdf",) + tuple(upload_key(f) for f in student_pdfs)
+        else:
+            zip_file = st.file_uploader("📦 제출물 ZIP 업로드", type="zip", key="student_zip_upload")
+            roster_file = st.file_uploader("👥 학생 명단 CSV (선택: 학번/이름 열)", type="csv", key="roster_upload")
+            if zip_file:
+                ingest_key = ("zip", upload_key(zip_file), upload_key(roster_file) if roster_file else None)
 
+        if ingest_key and ingest_key != st.session_state.get("ingest_key"):
+            roster = None
+            if roster_file:
+                try:
+                    roster = load_roster(roster_file)
+                except ValueError as e:
+                    st.error(str(e))
             with st.spinner("📄 PDF에서 텍스트 추출 중..."):
-                answers, info = process_student_pdfs(student_pdfs, save_session=True)
+                identify = roster.identify if roster else None
+                if zip_file:
+                    try:
+                        # 압축을 풀지 않고 PDF 항목을 하나씩 읽어 바로 추출
+                        filenames, info = ingest_zip(zip_file, identify)
+                        if not filenames:
+                            st.warning("ZIP 파일 안에 PDF가 없습니다.")
+                    except zipfile.BadZipFile:
+                        st.error("❌ 올바른 ZIP 파일이 아닙니다.")
+                else:
+                    filenames = [f.name for f in student_pdfs]
+                    _, info = process_student_pdfs(student_pdfs, save_session=False, identify=identify)
+            if filenames:
+                st.session_state.student_answers_data = info
+                st.session_state.match_report = match_report(filenames, roster) if roster else None
+                st.session_state.ingest_key = ingest_key
+
+        if ingest_key and ingest_key == st.session_state.get("ingest_key"):
+            if st.session_state.get("match_report"):
+                render_match_report(st.session_state.match_report)
 
+            info = st.session_state.student_answers_data
             if len(info) == 0:
                 st.error("❌ 텍스트를 추출하지 못했습니다. 스캔본일 수 있습니다.")
             else:
@@ -128,19 +191,10 @@ def run_step2():
                 for i in info:
                     st.markdown(f"- **{i['name']} ({i['id']})** → `{i['filename']}`")
 
-        # 2) '무작위 채점' 버튼을 누르면 첫 번째 PDF만 처리
-        if st.session_state.get("all_student_pdfs") and st.button("📌 무작위 채점"):
-            pdfs_to_grade = st.session_state.all_student_pdfs
-            first_pdf = pdfs_to_grade[0]
-            # save_session=False 로 전체 세션 데이터 덮어쓰지 않기
-            answers, info = process_student_pdfs([first_pdf], save_session=False)
-            if not answers:
-                st.warning("처리할 학생 답안이 없습니다.")
-                return
-
-            # ▶ 첫 번째 학생만 임시 채점
-            first_answer = answers[0]
-            first_info   = info[0]
+        # 2) '무작위 채점' 버튼을 누르면 첫 번째 학생 답안만 채점 (추출해 둔 텍스트 사용)
+        if st.session_state.get("student_answers_data") and st.button("📌 무작위 채점"):
+            first_info   = st.session_state.student_answers_data[0]
+            first_answer = first_info["text"]
             name, sid    = first_info['name'], first_info['id']
 
             # 6) GPT 채점 프롬프트 생성
@@ -3,6 +3,7 @@
 
 import streamlit as st
 from chains.grading_chain import grade_answer
+from steps.step4_batch_grading import start_speculative_grading
 
 
 def run_step3():
@@ -10,15 +11,18 @@ def run_step3():
 
     if st.session_state.problem_text and st.session_state.problem_filename:
         rubric_key = f"rubric_{st.session_state.problem_filename}"
-        original_rubric = st.session_state.generated_rubrics.get(rubric_key)
+        store = st.session_state.rubric_store
+        current = store.head(rubric_key)
 
-        if not original_rubric:
+        if not current:
             st.warning("채점 기준이 없습니다. STEP 1에서 먼저 생성해주세요.")
             if st.button("STEP 1로 이동"):
                 st.session_state.step = 1
             return
 
-        st.subheader("📊 원본 채점 기준")
+        # 피드백은 현재 버전(가장 최근 수정본)을 기준으로 누적 반영
+        original_rubric = current.text
+        st.subheader(f"📊 현재 채점 기준 (버전 `{current.hash}`)")
         st.markdown(original_rubric)
 
         feedback = st.text_area("✏️ 교수자 피드백 입력", value=st.session_state.feedback_text)
@@ -55,12 +59,27 @@ def run_step3():
 """
                 with st.spinner("기준을 수정 중입니다..."):
                     updated = grade_answer(prompt)
-                    st.session_state.modified_rubrics[rubric_key] = updated
-                    st.success("✅ 채점 기준 수정 완료")
+                if updated.startswith("[오류]"):
+                    st.error(updated)
+                else:
+                    version = store.commit(rubric_key, updated, source="피드백", note=feedback)
+                    st.success(f"✅ 채점 기준 수정 완료 (버전 `{version.hash}`)")
+                    start_speculative_grading(version)
+                    st.subheader("🆕 수정된 채점 기준")
+                    st.markdown(version.text)
 
-        if rubric_key in st.session_state.modified_rubrics:
-            st.subheader("🆕 수정된 채점 기준")
-            st.markdown(st.session_state.modified_rubrics[rubric_key])
+        job = st.session_state.get("speculative_job")
+        if job:
+            st.caption(f"🔮 버전 `{job.rubric_hash}` (`{job.mode}`) 백그라운드 사전 채점: {job.completed}/{job.total}명 완료")
+
+        history = store.history(rubric_key)
+        if len(history) > 1:
+            with st.expander(f"🕘 채점 기준 수정 이력 ({len(history)}개 버전)"):
+                for version in history:
+                    st.markdown(f"**`{version.hash}`** · {version.source}"
+                                + (f" · 피드백: {version.note}" if version.note else ""))
+                    if version.parent in store.versions:
+                        st.code(store.diff(version.parent, version.hash), language="diff")
 
     else:
         st.warning("먼저 STEP 1에서 문제를 업로드해주세요.")
@@ -2,75 +2,17 @@
 # 이 파일은 STEP 4: 전체 학생 답안을 일괄 채점하고 결과를 정리하는 Streamlit UI 및 실행 로직입니다.
 
 import streamlit as st
-from chains.grading_chain import grade_answer
+from chains.cascade import GradingCascade, validate_grading
+from chains.packing import pack_students, build_packed_prompt, split_packed_result, estimate_tokens
+from chains.speculative import SpeculativeJob
+from config.llm_config import get_cascade_config
 from utils.score_utils import extract_total_score, extract_evidence_sentences, extract_summary_feedback
 from utils.text_cleaning import apply_indentation
-import re
-from steps.step2_random_grading import process_student_pdfs
-
-def extract_total_score(text: str) -> float:
-    matches = re.findall(r"총점[:：]?\s*(\d+(?:\.\d+)?)", text)
-    if matches:
-        return float(matches[-1])
-    return None
-    
-def run_step4():
-    st.subheader("📄 STEP 4: 전체 학생 답안 일괄 채점")
-
-    rubric_key = f"rubric_{st.session_state.problem_filename}"
-    rubric_text = (
-        st.session_state.modified_rubrics.get(rubric_key)
-        or st.session_state.generated_rubrics.get(rubric_key)
-    )
-
-    if not rubric_text:
-        st.warning("채점 기준이 없습니다. STEP 1을 먼저 진행하세요.")
-        return
-
-    st.subheader("📊 채점 기준")
-    st.markdown(rubric_text)
-
-    # STEP2에서 저장한 전체 PDF 리스트가 있어야 진행
-    if not st.session_state.get("all_student_pdfs"):
-        st.warning("학생 답안이 없습니다. STEP 2를 먼저 진행하세요.")
-        return
-
-    if st.button("📝 전체 학생 채점 실행"):
-        # 전체 PDF를 다시 처리해서 answers, info 얻기 (세션에 저장됨)
-        info = st.session_state.get("student_answers_data", [])
-        if not info:
-            st.warning("❗ Step 2에서 텍스트를 저장하지 않았습니다. 즉시 PDF에서 추출합니다.")
-            with st.spinner("📂 PDF에서 텍스트 추출 중..."):
-                _, info = process_student_pdfs(st.session_state.all_student_pdfs, save_session=True)
-
-        if not info:
-            st.error("❌ 텍스트 추출 실패. 스캔본이거나 PDF에 텍스트가 없습니다.")
-            return
-            
-        st.session_state.highlighted_results = []
-        progress_bar = st.progress(0)
-        total_students = len(info)
-
-        with st.spinner("프로그램이 채점 중입니다..."):
-            for i, student in enumerate(info):
-                name, sid, answer = student["name"], student["id"], student["text"]
-
-                prompt = f"""
-당신은 대학 시험을 채점하는 GPT 채점자입니다.
-
-당신의 역할은, 사람이 작성한 "채점 기준"에 **엄격하게 따라** 학생의 답안을 채점하는 것입니다.  
-**창의적인 해석이나 기준 변경 없이**, 각 항목에 대해 **정확한 근거와 함께 점수를 부여**해야 합니다.
-
----
-
-📌 채점 기준:
-{rubric_text}
-
-📌 학생({name}, {sid})의 답안:
-{answer}
-
----
+from utils.session_store import ResultRecord
+from utils import results_table
 
+# 채점 출력 형식 및 지침 (단일 채점/묶음 채점 공용)
+GRADING_INSTRUCTIONS = """
 📌 채점 출력 형식
 다음 형식의 마크다운 표를 작성하세요:
 
@@ -107,24 +49,284 @@ def run_step4():
 8. 그리고 채점 결과를 문제별로 묶어서 보여주세요.
 9. 채점 결과 점수는 전체 채점 점수여야 합니다.
 """
-                grading_result = grade_answer(prompt)
-                evidence_sentences = extract_evidence_sentences(grading_result)
-                total_score = extract_total_score(grading_result)
-                feedback = extract_summary_feedback(grading_result)
-
-                st.session_state.highlighted_results.append({
-                    "name": name,
-                    "id": sid,
-                    "score": total_score,
-                    "feedback": feedback,
-                    "grading_result": grading_result,
-                    "original_text": answer,
-                    "evidence_sentences": evidence_sentences
-                })
-                progress_bar.progress((i + 1) / total_students)
 
+
+def build_grading_prompt(rubric_text, name, sid, answer):
+    return f"""
+당신은 대학 시험을 채점하는 GPT 채점자입니다.
+
+당신의 역할은, 사람이 작성한 "채점 기준"에 **엄격하게 따라** 학생의 답안을 채점하는 것입니다.  
+**창의적인 해석이나 기준 변경 없이**, 각 항목에 대해 **정확한 근거와 함께 점수를 부여**해야 합니다.
+
+---
+
+📌 채점 기준:
+{rubric_text}
+
+📌 학생({name}, {sid})의 답안:
+{answer}
+
+---
+{GRADING_INSTRUCTIONS}"""
+
+
+def default_grading_mode():
+    return {"cascade": get_cascade_config()["cascade"], "packing": False, "token_budget": 12000, "max_per_pack": 8}
+
+
+def mode_label(mode):
+    # cascade·묶음 채점 여부에 따라 채점 결과가 달라지므로 캐시 키와 사전 채점 작업에 함께 기록
+    return ("cascade" if mode["cascade"] else "strong") + ("+pack" if mode["packing"] else "")
+
+
+def cache_key(rubric_hash, mode_key, student):
+    return (rubric_hash, mode_key, student.text_key, student["id"])
+
+
+def make_packs(students, mode, rubric_text):
+    if not mode["packing"]:
+        return [[student] for student in students]
+    return pack_students(students, mode["token_budget"], mode["max_per_pack"],
+                         base_tokens=estimate_tokens(rubric_text + GRADING_INSTRUCTIONS))
+
+
+def is_cacheable(result):
+    # 형식 검증을 통과한 결과만 캐시 (GPT 호출 실패·형식 오류는 다음 실행 때 다시 채점)
+    return validate_grading(result["grading_result"])[0]
+
+
+def to_result_record(student, grading_result, rubric_hash):
+    # 원본 답안은 학생 레코드의 텍스트 키를 그대로 공유 (중복 저장 없음)
+    # 화면용 HTML 은 여기서 한 번만 만들어 저장소에 보관 (같은 답안이면 같은 블롭)
+    return ResultRecord(
+        student["name"], student["id"],
+        extract_total_score(grading_result),
+        extract_summary_feedback(grading_result),
+        grading_result,
+        student.text_key,
+        extract_evidence_sentences(grading_result),
+        rubric_hash,
+        apply_indentation(student["text"]),
+    )
+
+
+def grade_pack(grader, rubric_text, rubric_hash, pack):
+    """
+    학생 묶음을 채점하고 학생별 ResultRecord 목록을 반환합니다.
+    한 명짜리 묶음은 기존과 같이 단일 채점하고, 여러 명이면 한 번의 요청으로 채점한 뒤 학생별로 나눕니다.
+    cascade 의 2차 의견도 묶음 단위로 한 번만 요청합니다.
+    묶음 응답에서 결과를 찾지 못한 학생은 단일 채점으로 다시 채점합니다.
+    """
+    prompts = [build_grading_prompt(rubric_text, s["name"], s["id"], s["text"]) for s in pack]
+    if len(pack) == 1:
+        return [to_result_record(pack[0], grader.grade(prompts[0]), rubric_hash)]
+
+    packed_prompt = build_packed_prompt(rubric_text, pack, GRADING_INSTRUCTIONS)
+    sections = split_packed_result(grader.invoke(grader.first_tier, packed_prompt), len(pack))
+    second = {}
+    if grader.uses_second_opinion:
+        second = split_packed_result(grader.invoke("second_opinion", packed_prompt), len(pack))
+    results = []
+    for k, (student, prompt) in enumerate(zip(pack, prompts), start=1):
+        # 분리된 결과는 cascade 검증을 거치고, 누락된 학생은 단일 채점
+        result = grader.grade(prompt, first_pass=sections.get(k), second_opinion=second.get(k))
+        results.append(to_result_record(student, result, rubric_hash))
+    return results
+
+
+def start_speculative_grading(rubric_version):
+    """
+    사전 채점 모드가 켜져 있으면, 저장된 채점 기준 버전으로 전체 학생을 백그라운드에서 미리 채점합니다.
+    채점 방식은 STEP 4에서 마지막으로 선택한 설정(없으면 기본 설정)을 따릅니다.
+    이전 버전(또는 다른 채점 방식)으로 진행 중이던 사전 채점은 취소됩니다.
+    """
+    mode = st.session_state.get("grading_mode") or default_grading_mode()
+    mode_key = mode_label(mode)
+    job = st.session_state.get("speculative_job")
+    if job and (job.rubric_hash, job.mode) != (rubric_version.hash, mode_key):
+        job.cancel()
+        st.session_state.speculative_job = job = None
+    if not st.session_state.get("speculative_grading") or job:
+        return
+
+    cache = st.session_state.grading_cache
+    students = [s for s in st.session_state.get("student_answers_data", [])
+                if cache_key(rubric_version.hash, mode_key, s) not in cache]
+    if not students:
+        return
+    grader = GradingCascade(get_cascade_config(), enabled=mode["cascade"])
+
+    def grade_fn(pack):
+        results = grade_pack(grader, rubric_version.text, rubric_version.hash, pack)
+        return {cache_key(rubric_version.hash, mode_key, s): r for s, r in zip(pack, results)}
+
+    st.session_state.speculative_job = SpeculativeJob(
+        rubric_version.hash, make_packs(students, mode, rubric_version.text), grade_fn, mode=mode_key, grader=grader,
+    )
+
+
+def collect_speculative_results(rubric_version, mode_key, grader):
+    """
+    현재 채점 기준 버전·채점 방식의 사전 채점 결과를 캐시에 합치고 작업을 정리합니다. (가져온 결과 수 반환)
+    사전 채점에 쓴 호출 통계는 grader(STEP 4 채점기)에 합쳐 모델별 호출 통계에 함께 표시합니다.
+    """
+    job = st.session_state.get("speculative_job")
+    if not job:
+        return 0
+    st.session_state.speculative_job = None
+    if (job.rubric_hash, job.mode) != (rubric_version.hash, mode_key):
+        job.cancel()
+        return 0
+    # STEP 4 직접 채점과 같이 형식 검증을 통과한 결과만 캐시에 합침
+    results = {key: result for key, result in job.finish().items() if is_cacheable(result)}
+    if job.grader:
+        grader.merge(job.grader)
+    st.session_state.grading_cache.update(results)
+    return len(results)
+
+
+def render_analytics(results):
+    """
+    채점 결과를 항목 단위 표로 변환해 통계와 내보내기(CSV/Parquet)를 보여줍니다.
+    """
+    df = results_table.results_to_frame(results)
+
+    st.subheader("📈 채점 통계")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**총점 분포**")
+        st.bar_chart(results_table.score_histogram(df), x="구간 시작", y="학생 수")
+    with col2:
+        st.markdown("**문항/항목별 평균 및 분산**")
+        st.dataframe(results_table.question_stats(df), hide_index=True)
+
+    with st.expander("⚠️ 0점 항목 및 이상치"):
+        st.markdown("**0점 처리된 항목**")
+        st.dataframe(results_table.zero_score_rows(df), hide_index=True)
+        st.markdown("**항목별 이상치 (|z| ≥ 2.5)**")
+        st.dataframe(results_table.detect_outliers(df), hide_index=True)
+
+    previous = st.session_state.get("previous_highlighted_results")
+    if previous:
+        with st.expander("🔀 이전 채점 대비 점수 변화"):
+            drift = results_table.rubric_drift(results_table.results_to_frame(previous), df)
+            st.dataframe(drift[drift["delta"].fillna(1) != 0], hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ CSV 내보내기", results_table.to_csv_bytes(df),
+                           file_name="grading_results.csv", mime="text/csv")
+    with col2:
+        try:
+            parquet = results_table.to_parquet_bytes(df)
+            st.download_button("⬇️ Parquet 내보내기", parquet,
+                               file_name="grading_results.parquet", mime="application/octet-stream")
+        except ImportError:
+            st.caption("Parquet 내보내기를 사용하려면 pyarrow 를 설치하세요.")
+
+
+def run_step4():
+    st.subheader("📄 STEP 4: 전체 학생 답안 일괄 채점")
+
+    rubric_key = f"rubric_{st.session_state.problem_filename}"
+    rubric_version = st.session_state.rubric_store.head(rubric_key)
+
+    if not rubric_version:
+        st.warning("채점 기준이 없습니다. STEP 1을 먼저 진행하세요.")
+        return
+    rubric_text = rubric_version.text
+
+    st.subheader(f"📊 채점 기준 (버전 `{rubric_version.hash}`)")
+    st.markdown(rubric_text)
+
+    # STEP2에서 추출해 저장한 학생 답안이 있어야 진행
+    if not st.session_state.get("student_answers_data"):
+        st.warning("학생 답안이 없습니다. STEP 2를 먼저 진행하세요.")
+        return
+
+    cascade_config = get_cascade_config()
+    mode = dict(st.session_state.get("grading_mode") or default_grading_mode())
+    mode["cascade"] = st.checkbox(
+        f"⚡ 빠른 모델({cascade_config['fast_model']})로 먼저 채점하고 불확실한 답안만 "
+        f"{cascade_config['strong_model']}로 재채점",
+        value=mode["cascade"],
+    )
+    mode["packing"] = st.checkbox("📦 짧은 답안 묶음 채점 (여러 학생을 한 번의 요청으로 채점)", value=mode["packing"])
+    if mode["packing"]:
+        col1, col2 = st.columns(2)
+        mode["token_budget"] = col1.number_input("요청당 토큰 예산", min_value=2000, max_value=100000,
+                                                 value=mode["token_budget"], step=1000)
+        mode["max_per_pack"] = col2.number_input("요청당 최대 학생 수", min_value=2, max_value=20,
+                                                 value=mode["max_per_pack"])
+    # 사전 채점도 이 설정으로 진행되도록 세션에 보관
+    st.session_state.grading_mode = mode
+    mode_key = mode_label(mode)
+
+    job = st.session_state.get("speculative_job")
+    if job and job.rubric_hash == rubric_version.hash:
+        if job.mode == mode_key:
+            st.info(f"🔮 백그라운드 사전 채점 진행 중: {job.completed}/{job.total}명 완료")
+        else:
+            st.info(f"🔮 백그라운드 사전 채점은 다른 채점 방식(`{job.mode}`)으로 진행 중이어서 "
+                    f"현재 설정(`{mode_key}`)의 채점에는 사용되지 않습니다.")
+
+    if st.button("📝 전체 학생 채점 실행"):
+        # STEP 2에서 추출해 둔 답안 사용 (PDF 원본은 추출 후 보관하지 않음)
+        info = st.session_state.student_answers_data
+
+        # 직전 채점 결과는 루브릭 수정 전후 점수 변화 비교용으로 보관
+        previous = st.session_state.get("highlighted_results")
+        if previous and previous[0].rubric_version != rubric_version.hash:
+            st.session_state.previous_highlighted_results = previous
+
+        # 백그라운드 사전 채점 결과를 먼저 가져오고, 같은 채점 기준 버전으로 이미 채점한 답안은 다시 채점하지 않음
+        grader = GradingCascade(cascade_config, enabled=mode["cascade"])
+        collect_speculative_results(rubric_version, mode_key, grader)
+        cache = st.session_state.grading_cache
+        pending = [s for s in info if cache_key(rubric_version.hash, mode_key, s) not in cache]
+        failed = {}
+        total_students = len(info)
+        if len(pending) < total_students:
+            st.info(f"♻️ 채점 기준 버전 `{rubric_version.hash}`로 이미 채점된 "
+                    f"{total_students - len(pending)}명의 결과를 재사용합니다.")
+
+        if pending:
+            progress_bar = st.progress(0)
+            with st.spinner("프로그램이 채점 중입니다..."):
+                done = 0
+                for pack in make_packs(pending, mode, rubric_text):
+                    for student, result in zip(pack, grade_pack(grader, rubric_text, rubric_version.hash, pack)):
+                        key = cache_key(rubric_version.hash, mode_key, student)
+                        if is_cacheable(result):
+                            cache[key] = result
+                        else:
+                            failed[key] = result
+                    done += len(pack)
+                    progress_bar.progress(done / len(pending))
+
+        if failed:
+            st.warning(f"⚠️ {len(failed)}명은 채점 결과 형식 확인에 실패했습니다. 다시 실행하면 이 학생들만 재채점합니다.")
+        st.session_state.highlighted_results = [
+            cache.get(key) or failed[key] for key in (cache_key(rubric_version.hash, mode_key, s) for s in info)
+        ]
+
+        st.session_state.cascade_report = {
+            "tiers": grader.report(),
+            "escalations": dict(grader.escalations),
+            "rate": grader.escalation_rate(),
+            "enabled": grader.enabled,
+        }
         st.success(f"✅ 전체 {total_students}명 학생 채점 완료!")
 
+    report = st.session_state.get("cascade_report")
+    if report:
+        with st.expander("⚡ 모델별 호출 통계"):
+            st.table(report["tiers"])
+            if report["enabled"]:
+                st.markdown(f"**상위 모델 재채점 비율:** {report['rate']:.0%}")
+                if report["escalations"]:
+                    st.table([{"사유": k, "건수": v} for k, v in report["escalations"].items()])
+
     if st.session_state.highlighted_results:
         sorted_results = sorted(
             st.session_state.highlighted_results,
@@ -139,6 +341,8 @@ def run_step4():
         ]
         st.table(summary_data)
 
+        render_analytics(st.session_state.highlighted_results)
+
         st.subheader("📝 학생별 상세 답안 및 채점")
         for result in sorted_results:
             with st.expander(f"📄 {result['name']} ({result['id']}) - {result['score']}점"):
@@ -150,5 +354,4 @@ def run_step4():
 
                 with tab2:
                     st.markdown("**📄 문단 구조로 정리된 답안**")
-                    formatted = apply_indentation(result["original_text"])
-                    st.markdown(formatted, unsafe_allow_html=True)
+                    st.markdown(result["original_html"], unsafe_allow_html=True)
@@ -1,24 +1,31 @@
 import io
 import pdfplumber
-from typing import Union
+from typing import Iterator, Union
 
-def extract_text_from_pdf(pdf_data: Union[str, bytes, "UploadedFile"]) -> str:
+
+def _read_pdf_bytes(pdf_data: Union[str, bytes, "UploadedFile"]) -> bytes:
     # PDF 데이터를 byte로 변환
     if isinstance(pdf_data, str):
         with open(pdf_data, "rb") as f:
-            pdf_bytes = f.read()
+            return f.read()
     elif isinstance(pdf_data, bytes):
-        pdf_bytes = pdf_data
+        return pdf_data
     elif hasattr(pdf_data, "read"):
-        pdf_bytes = pdf_data.read()
-    else:
-        raise ValueError("지원하지 않는 입력 타입입니다.")
+        return pdf_data.read()
+    raise ValueError("지원하지 않는 입력 타입입니다.")
+
 
-    # PDF의 텍스트 레이어에서 텍스트 추출 (OCR 없음)
-    pages_text = []
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+def iter_pdf_pages(pdf_data: Union[str, bytes, "UploadedFile"]) -> Iterator[str]:
+    """
+    PDF의 텍스트 레이어를 페이지 단위로 하나씩 추출합니다. (OCR 없음)
+    전체 페이지 텍스트를 목록으로 모아두지 않으므로 바로 정리 단계(text_cleaning)로 흘려보낼 수 있습니다.
+    """
+    with pdfplumber.open(io.BytesIO(_read_pdf_bytes(pdf_data))) as pdf:
         for page in pdf.pages:
-            text = page.extract_text() or ""
-            pages_text.append(text)
+            yield page.extract_text() or ""
+            # 처리한 페이지의 파싱 캐시를 바로 해제
+            page.flush_cache()
 
-    return "\n".join(pages_text).strip()
+
+def extract_text_from_pdf(pdf_data: Union[str, bytes, "UploadedFile"]) -> str:
+    return "\n".join(iter_pdf_pages(pdf_data)).strip()
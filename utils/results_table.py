@@ -0,0 +1,177 @@
+# results_table.py
+# 이 파일은 STEP 4 채점 결과를 (학생 × 채점 항목) 한 행씩의 pandas 표로 정리하고,
+# CSV/Parquet 내보내기와 점수 분포·문항별 통계·이상치·루브릭 버전 간 차이 분석 함수를 제공합니다.
+
+import io
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["submission", "name", "id", "question", "criterion", "max_points", "awarded", "total_score", "rubric_version"]
+
+_QUESTION_RE = re.compile(r'문제\s*(\d+)')
+_TABLE_ROW_RE = re.compile(r'^\s*\|(.+)\|\s*$')
+_SEPARATOR_RE = re.compile(r'^[\s|:\-]+$')
+_NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)')
+_TOTAL_ROW_RE = re.compile(r'총점|합계')
+
+
+def _to_number(cell):
+    match = _NUMBER_RE.search(cell)
+    return float(match.group(1)) if match else np.nan
+
+
+def parse_grading_rows(grading_text):
+    """
+    GPT 채점 결과 마크다운에서 항목별 점수 표를 읽어 (문제, 항목, 배점, 부여 점수) 목록으로 반환합니다.
+    예: "| 핵심 개념 설명 | 3점 | 2점 | ... |" → ("1", "핵심 개념 설명", 3.0, 2.0)
+    """
+    rows = []
+    question = ""
+    for line in (grading_text or "").split('\n'):
+        row_match = _TABLE_ROW_RE.match(line)
+        if not row_match:
+            q_match = _QUESTION_RE.search(line)
+            if q_match:
+                question = q_match.group(1)
+            continue
+        if _SEPARATOR_RE.match(line):
+            continue
+        cells = [c.strip() for c in row_match.group(1).split('|')]
+        # 헤더 행 및 열 개수가 맞지 않는 표(근거 문장 등)는 제외
+        if len(cells) < 3 or cells[0] in ("채점 항목", "항목") or "배점" in cells[1]:
+            continue
+        # 표 안에 합계 행을 넣는 경우가 있어 제외 (총점은 total_score 열로 관리)
+        if _TOTAL_ROW_RE.search(cells[0]):
+            continue
+        max_points, awarded = _to_number(cells[1]), _to_number(cells[2])
+        if np.isnan(max_points) and np.isnan(awarded):
+            continue
+        rows.append((question, cells[0].strip("* "), max_points, awarded))
+    return rows
+
+
+def results_to_frame(results):
+    """
+    채점 결과 목록(highlighted_results)을 학생 × 채점 항목 단위의 DataFrame 으로 변환합니다.
+    항목 표를 읽지 못한 학생도 총점만 담긴 한 행으로 포함됩니다.
+    submission 열은 답안 텍스트 키로 만든 제출물별 고유 키입니다. 이름/학번을 읽지 못했거나
+    (UnknownName/UnknownID) 같은 학생이 여러 번 제출해도 결과가 합쳐지지 않도록 집계·비교는 이 키를 기준으로 합니다.
+    """
+    records = []
+    seen = Counter()
+    for r in results:
+        text_key = (r.get("text_key") or "")[:12]
+        seen[text_key] += 1
+        # 내용이 똑같은 제출물이 여러 개면 순서 번호를 붙여 구분
+        submission = text_key if seen[text_key] == 1 else f"{text_key}#{seen[text_key]}"
+        parsed = parse_grading_rows(r["grading_result"])
+        if not parsed:
+            parsed = [("", "", np.nan, np.nan)]
+        for question, criterion, max_points, awarded in parsed:
+            records.append((submission, r["name"], r["id"], question, criterion, max_points, awarded, r["score"],
+                            r.get("rubric_version", "")))
+
+    df = pd.DataFrame.from_records(records, columns=COLUMNS)
+    df["max_points"] = df["max_points"].astype("float64")
+    df["awarded"] = df["awarded"].astype("float64")
+    df["total_score"] = pd.to_numeric(df["total_score"], errors="coerce")
+    for col in ("submission", "name", "id", "question", "criterion", "rubric_version"):
+        df[col] = df[col].astype("category")
+    return df
+
+
+def student_totals(df):
+    """
+    제출물별 총점 표 (GPT가 적은 총점이 없으면 항목 점수 합으로 대체)
+    """
+    grouped = df.groupby(["submission", "name", "id"], observed=True)
+    totals = grouped["total_score"].first()
+    return totals.fillna(grouped["awarded"].sum(min_count=1)).rename("score").reset_index()
+
+
+def to_csv_bytes(df):
+    """
+    LMS 업로드용 CSV (엑셀에서 한글이 깨지지 않도록 BOM 포함)
+    """
+    return df.to_csv(index=False).encode("utf-8-sig")
+
+
+def to_parquet_bytes(df):
+    """
+    Parquet 바이트를 반환합니다. pyarrow 가 설치되어 있어야 합니다.
+    """
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+def score_histogram(df, bins=10):
+    """
+    학생 총점 분포 히스토그램 (구간 시작 점수, 구간, 학생 수)
+    차트의 x 축은 숫자인 "구간 시작" 열을 사용합니다. ("3~6" 같은 문자열은 "12~15" 뒤로 정렬되므로)
+    """
+    scores = student_totals(df)["score"].dropna().to_numpy()
+    if scores.size == 0:
+        return pd.DataFrame(columns=["구간 시작", "구간", "학생 수"])
+    counts, edges = np.histogram(scores, bins=bins)
+    labels = [f"{lo:g}~{hi:g}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return pd.DataFrame({
+        "구간 시작": edges[:-1].round(2),
+        "구간": pd.Categorical(labels, categories=labels, ordered=True),
+        "학생 수": counts,
+    })
+
+
+def question_stats(df):
+    """
+    문제/항목별 평균, 분산, 득점률, 0점 비율
+    """
+    stats = df.dropna(subset=["awarded"]).groupby(["question", "criterion"], observed=True).agg(
+        배점=("max_points", "max"),
+        평균=("awarded", "mean"),
+        분산=("awarded", "var"),
+        학생수=("awarded", "size"),
+        영점비율=("awarded", lambda s: (s == 0).mean()),
+    )
+    stats["득점률"] = stats["평균"] / stats["배점"]
+    return stats.reset_index()
+
+
+def zero_score_rows(df):
+    """
+    0점을 받은 (학생, 항목) 행
+    """
+    return df.loc[df["awarded"] == 0, ["submission", "name", "id", "question", "criterion", "max_points"]]
+
+
+def detect_outliers(df, z_threshold=2.5):
+    """
+    항목별 점수의 z-점수가 기준을 넘는 (학생, 항목) 행을 반환합니다.
+    """
+    scored = df.dropna(subset=["awarded"])
+    grouped = scored.groupby(["question", "criterion"], observed=True)["awarded"]
+    std = grouped.transform("std")
+    z = (scored["awarded"] - grouped.transform("mean")) / std.where(std > 0)
+    out = scored.assign(z=z)
+    return out.loc[out["z"].abs() >= z_threshold, ["submission", "name", "id", "question", "criterion", "awarded", "z"]]
+
+
+def rubric_drift(df_before, df_after):
+    """
+    두 채점 결과(예: 서로 다른 루브릭 버전) 사이의 제출물·항목별 점수 변화.
+    """
+    keys = ["submission", "question", "criterion"]
+    columns = keys + ["name", "id", "awarded"]
+    before = df_before[columns].astype({k: "object" for k in columns[:-1]})
+    after = df_after[columns].astype({k: "object" for k in columns[:-1]})
+    merged = before.merge(after.drop(columns=["name", "id"]), on=keys, how="outer", suffixes=("_before", "_after"))
+    # 새 결과에만 있는 제출물은 새 결과의 이름/학번으로 채움
+    names = after.drop_duplicates("submission").set_index("submission")
+    missing = merged["name"].isna()
+    merged.loc[missing, "name"] = merged.loc[missing, "submission"].map(names["name"])
+    merged.loc[missing, "id"] = merged.loc[missing, "submission"].map(names["id"])
+    merged["delta"] = merged["awarded_after"] - merged["awarded_before"]
+    merged = merged[["submission", "name", "id", "question", "criterion", "awarded_before", "awarded_after", "delta"]]
+    return merged.sort_values("delta", key=lambda s: s.abs(), ascending=False, na_position="last")
@@ -0,0 +1,94 @@
+# rubric_store.py
+# 이 파일은 채점 기준(루브릭)의 버전을 관리하는 가벼운 로컬 저장소입니다.
+# 각 버전은 내용 해시로 식별되고 이전 버전(parent)을 가리키므로,
+# 수정 이력 조회, 버전 간 차이(diff) 비교, 해시로 빠른 조회가 가능합니다.
+
+import time
+import difflib
+import hashlib
+
+
+def rubric_hash(text: str) -> str:
+    """
+    채점 기준 내용 해시 (앞뒤 공백은 무시)
+    """
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:12]
+
+
+class RubricVersion:
+    """
+    채점 기준 한 버전 (내용, 부모 버전 해시, 생성 경로, 생성 시각)
+    """
+    __slots__ = ("hash", "text", "parent", "source", "note", "created_at")
+
+    def __init__(self, text, parent=None, source="", note=""):
+        self.hash = rubric_hash(text)
+        self.text = text
+        self.parent = parent
+        self.source = source
+        self.note = note
+        self.created_at = time.time()
+
+
+class RubricStore:
+    """
+    문제 파일(rubric_key)별 채점 기준 버전 저장소.
+    같은 내용을 다시 저장하면 새 버전을 만들지 않고 기존 버전을 그대로 반환합니다.
+    """
+
+    def __init__(self):
+        self.versions = {}  # hash → RubricVersion
+        self.heads = {}     # rubric_key → 현재 버전 hash
+        self.roots = {}     # rubric_key → 최초 생성 버전 hash
+
+    def commit(self, rubric_key, text, source="", note="", parent=None):
+        """
+        새 버전을 저장하고 현재 버전(head)으로 지정합니다.
+        parent 를 생략하면 현재 head 가 부모가 됩니다. 처음 생성(재생성)이면 parent=False 로 이력을 새로 시작합니다.
+        """
+        h = rubric_hash(text)
+        if parent is None:
+            parent = self.heads.get(rubric_key)
+        if h not in self.versions:
+            self.versions[h] = RubricVersion(text, parent or None, source, note)
+        if parent is False or rubric_key not in self.roots:
+            self.roots[rubric_key] = h
+        self.heads[rubric_key] = h
+        return self.versions[h]
+
+    def head(self, rubric_key):
+        h = self.heads.get(rubric_key)
+        return self.versions[h] if h else None
+
+    def root(self, rubric_key):
+        h = self.roots.get(rubric_key)
+        return self.versions[h] if h else None
+
+    def get(self, h):
+        """
+        해시(또는 앞부분)로 버전을 조회합니다.
+        """
+        if h in self.versions:
+            return self.versions[h]
+        matches = [v for key, v in self.versions.items() if key.startswith(h)]
+        return matches[0] if len(matches) == 1 else None
+
+    def history(self, rubric_key):
+        """
+        현재 버전부터 부모 링크를 따라 최초 버전까지의 목록
+        """
+        chain, h = [], self.heads.get(rubric_key)
+        while h and h in self.versions and h not in chain:
+            chain.append(h)
+            h = self.versions[h].parent
+        return [self.versions[h] for h in chain]
+
+    def diff(self, old_hash, new_hash):
+        """
+        두 버전 사이의 unified diff 텍스트
+        """
+        old, new = self.versions[old_hash], self.versions[new_hash]
+        return "\n".join(difflib.unified_diff(
+            old.text.splitlines(), new.text.splitlines(),
+            fromfile=old.hash, tofile=new.hash, lineterm=""
+        ))
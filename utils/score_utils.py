@@ -3,13 +3,20 @@
 
 import re
 
+# "총점" 뒤의 점수 (만점 표기 "/30" 과 "점" 은 선택)
+_TOTAL_SCORE_RE = re.compile(r'총점(?:\*\*)?\s*[:：]?\s*(\d+(?:\.\d+)?)(?:\s*/\s*\d+(?:\.\d+)?)?\s*점?')
+
 def extract_total_score(grading_text):
     """
     채점 결과 텍스트에서 총점을 추출합니다.
-    예: "**총점: 23점**" → 23
+    예: "**총점: 23점**" → 23, "**총점: 23.5점**" → 23.5, "**총점: 23**" → 23,
+        "총점: 27/30점" → 27, "**총점**: 27 / 30" → 27 (여러 개면 마지막 총점)
     """
-    match = re.search(r'총점[:：]?\s*(\d+)\s*점', grading_text)
-    return int(match.group(1)) if match else None
+    matches = _TOTAL_SCORE_RE.findall(grading_text)
+    if not matches:
+        return None
+    score = float(matches[-1])
+    return int(score) if score.is_integer() else score
 
 def extract_evidence_sentences(grading_text):
     """
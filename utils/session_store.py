@@ -0,0 +1,234 @@
+# session_store.py
+# 이 파일은 세션에 저장되는 학생 답안/채점 결과를 가볍게 유지하기 위한 저장소입니다.
+# 큰 데이터(추출 텍스트, GPT 채점 결과)는 내용 해시 기준으로 로컬 디스크에 한 번만 저장하고,
+# 세션에는 __slots__ 기반의 작은 레코드(메타데이터 + 해시 키)만 보관합니다.
+# 살아 있는 레코드가 가리키는 블롭은 정리(prune_blobs) 대상에서 제외됩니다.
+
+import os
+import time
+import weakref
+import hashlib
+import tempfile
+import threading
+from collections import Counter
+
+# 블롭 저장 경로 (환경변수로 변경 가능, 프로세스 내 모든 세션이 공유, 첫 저장 시 생성)
+BLOB_DIR = os.environ.get("DPT_BLOB_DIR") or os.path.join(tempfile.gettempdir(), "dpt_blobs")
+
+# 보관 한도: 마지막 사용 후 BLOB_TTL 이 지났거나 전체 용량이 BLOB_MAX_BYTES 를 넘으면 오래된 것부터 삭제
+BLOB_TTL = float(os.environ.get("DPT_BLOB_TTL_HOURS", 24)) * 3600
+BLOB_MAX_BYTES = int(float(os.environ.get("DPT_BLOB_MAX_MB", 2048)) * 1024 * 1024)
+PRUNE_INTERVAL = 600  # 정리 작업 최소 간격(초)
+_last_prune = float("-inf")
+
+# 살아 있는 레코드가 참조 중인 블롭 키 → 참조 수 (레코드가 사라지면 감소)
+_pins = Counter()
+_pins_lock = threading.Lock()
+
+
+class MissingBlobError(LookupError):
+    """
+    세션 레코드가 가리키는 블롭이 디스크에 없는 경우 (저장소 폴더가 지워진 경우 등). 답안을 다시 업로드해야 합니다.
+    """
+
+
+def _pin(keys):
+    with _pins_lock:
+        _pins.update(keys)
+
+
+def _unpin(keys):
+    with _pins_lock:
+        _pins.subtract(keys)
+        for key in keys:
+            if _pins[key] <= 0:
+                del _pins[key]
+
+
+def _blob_path(key: str) -> str:
+    # 한 디렉토리에 파일이 몰리지 않도록 해시 앞 2자리로 하위 폴더 분리
+    return os.path.join(BLOB_DIR, key[:2], key)
+
+
+def put_bytes(data: bytes) -> str:
+    """
+    바이트 데이터를 내용 해시(sha256)로 저장하고 키를 반환합니다.
+    같은 내용은 한 번만 저장됩니다.
+    """
+    key = hashlib.sha256(data).hexdigest()
+    path = _blob_path(key)
+    if os.path.exists(path):
+        _touch(path)
+        return key
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 임시 파일에 쓴 뒤 교체하여 동시 세션에서도 깨진 파일이 읽히지 않도록 처리
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    maybe_prune_blobs(keep=key)
+    return key
+
+
+def put_text(text: str) -> str:
+    """
+    텍스트를 UTF-8로 저장하고 키를 반환합니다.
+    """
+    return put_bytes((text or "").encode("utf-8"))
+
+
+def get_bytes(key: str) -> bytes:
+    """
+    키에 해당하는 바이트 데이터를 디스크에서 읽어옵니다.
+    """
+    path = _blob_path(key)
+    with open(path, "rb") as f:
+        data = f.read()
+    _touch(path)
+    return data
+
+
+def _touch(path):
+    # 수정 시각을 마지막 사용 시각으로 사용 (정리 시 최근에 쓰인 블롭은 남김)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_blobs(ttl=None, max_bytes=None, keep=None):
+    """
+    오래 쓰이지 않은 블롭을 삭제하고 삭제한 파일 수를 반환합니다.
+    마지막 사용 후 ttl(초)이 지난 블롭을 지우고, 남은 용량이 max_bytes 를 넘으면 가장 오래된 것부터 지웁니다.
+    살아 있는 레코드가 참조 중인 블롭과 keep(방금 저장한 키)은 지우지 않습니다.
+    """
+    ttl = BLOB_TTL if ttl is None else ttl
+    max_bytes = BLOB_MAX_BYTES if max_bytes is None else max_bytes
+    with _pins_lock:
+        pinned = set(_pins)
+    if keep:
+        pinned.add(keep)
+    entries = []
+    for root, _, files in os.walk(BLOB_DIR):
+        for name in files:
+            if name in pinned:
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+
+    cutoff = time.time() - ttl
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def maybe_prune_blobs(keep=None):
+    """
+    새 블롭을 저장할 때 호출되며, PRUNE_INTERVAL 마다 한 번만 정리합니다.
+    """
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    prune_blobs(keep=keep)
+
+
+def get_text(key: str) -> str:
+    """
+    키에 해당하는 텍스트를 지연 로딩합니다.
+    (메모리에 캐시하지 않음: 화면은 매 재실행마다 모든 학생을 같은 순서로 읽으므로 LRU 캐시는 적중하지 않고 RAM만 차지)
+    """
+    if not key:
+        return ""
+    try:
+        return get_bytes(key).decode("utf-8")
+    except FileNotFoundError:
+        raise MissingBlobError(key) from None
+
+
+class _Record:
+    """
+    dict 처럼 record["name"], record.get("score") 로 접근할 수 있는 슬롯 레코드의 공통 부모.
+    텍스트 필드는 _lazy_fields 에 정의된 키 필드를 통해 디스크에서 지연 로딩됩니다.
+    하위 클래스는 키 필드를 채운 뒤 _pin_blobs() 를 호출해, 레코드가 살아 있는 동안 블롭이 정리되지 않게 합니다.
+    """
+    __slots__ = ("__weakref__",)
+    _lazy_fields = {}
+
+    def _pin_blobs(self):
+        keys = [key for key in (getattr(self, attr) for attr in self._lazy_fields.values()) if key]
+        _pin(keys)
+        weakref.finalize(self, _unpin, keys)
+
+    def __getitem__(self, field):
+        key_attr = self._lazy_fields.get(field)
+        if key_attr is not None:
+            return get_text(getattr(self, key_attr))
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def __contains__(self, field):
+        return field in self._lazy_fields or field in self.__slots__
+
+
+class StudentRecord(_Record):
+    """
+    학생 한 명의 답안 정보 (이름, 학번, 파일명, 답안 텍스트 키).
+    record["text"] 로 접근하면 답안 텍스트를 디스크에서 읽어옵니다.
+    """
+    __slots__ = ("name", "id", "filename", "text_key")
+    _lazy_fields = {"text": "text_key"}
+
+    def __init__(self, name: str, sid: str, filename: str, text: str):
+        self.name = name
+        self.id = sid
+        self.filename = filename
+        self.text_key = put_text(text)
+        self._pin_blobs()
+
+
+class ResultRecord(_Record):
+    """
+    학생 한 명의 채점 결과 (채점에 사용한 채점 기준 버전 해시 포함).
+    record["grading_result"], record["original_text"], record["original_html"] 은 디스크에서 지연 로딩됩니다.
+    original_html 은 화면 표시용으로 한 번만 만들어 둔 답안 HTML 입니다. (원본 답안과 같이 내용 해시로 공유)
+    """
+    __slots__ = ("name", "id", "score", "feedback", "evidence_sentences", "result_key", "text_key",
+                 "rubric_version", "html_key")
+    _lazy_fields = {"grading_result": "result_key", "original_text": "text_key", "original_html": "html_key"}
+
+    def __init__(self, name, sid, score, feedback, grading_result, text_key, evidence_sentences=(),
+                 rubric_version="", original_html=""):
+        self.name = name
+        self.id = sid
+        self.score = score
+        self.feedback = feedback
+        self.evidence_sentences = tuple(evidence_sentences)
+        self.result_key = put_text(grading_result)
+        self.text_key = text_key
+        self.rubric_version = rubric_version
+        self.html_key = put_text(original_html) if original_html else ""
+        self._pin_blobs()
@@ -1,39 +1,142 @@
 # text_cleaning.py
 # 이 파일은 추출된 텍스트를 문단 단위로 정리하거나 들여쓰기를 적용하는 유틸 함수들을 포함합니다.
+# 페이지 단위로 한 번만 훑으며 정리하고(제너레이터), 머리글/바닥글/페이지 번호 패턴은 미리 컴파일해 둡니다.
+# 과목 코드처럼 시험마다 다른 머리글은 skip_patterns 인자(또는 secrets 의 [cleaning] skip_patterns)로 지정합니다.
+# 설정이 없으면 DEFAULT_COURSE_SKIP_PATTERNS(기존 과목 머리글)를 사용하고, 다른 과목은 설정값으로 대체합니다.
 
 import re
 import html
+from collections import Counter
+from functools import lru_cache
 
-def clean_text_postprocess(text):
+# 기본으로 제거할 줄: 페이지 번호, 학번+이름 줄
+DEFAULT_SKIP_PATTERNS = (
+    r'^\s*-\s*\d+\s*-$',                            # - 3 -
+    r'^(?i:page)\s*\d+(?:\s*(?:/|(?i:of))\s*\d+)?$',  # Page 3, Page 3 of 10
+    r'^\d+\s*(?:페이지|쪽)$',                        # 3 페이지
+    r'^\d{9,10}\s*[가-힣]+$',                         # 202312345 김채점
+)
+
+# [cleaning] skip_patterns 의 기본값: 기존 과목 코드/시험명 머리글 (skip_patterns = [] 로 끌 수 있음)
+DEFAULT_COURSE_SKIP_PATTERNS = (r'DIGB226|Final Take-Home Exam',)
+
+_HEADING_RE = re.compile(r'^\d+(\.\d+)*\s')
+_QUESTION_RE = re.compile(r'문제\s*\d+')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+@lru_cache(maxsize=32)
+def compile_skip_patterns(extra_patterns=()):
     """
-    PDF에서 추출한 텍스트를 문단별로 정리하고 불필요한 줄을 제거합니다.
+    기본 패턴과 추가 패턴을 정규식으로 미리 합쳐 컴파일하고, 줄 검사 함수(line → 일치 여부)를 반환합니다.
+    줄 시작(^)에 고정된 패턴과 줄 어디서나 찾는 패턴은 따로 합칩니다.
+    (하나로 합치면 고정된 패턴까지 줄의 모든 위치에서 다시 시도하게 되어 느려짐)
     """
-    lines = text.split('\n')
-    cleaned = []
+    patterns = DEFAULT_SKIP_PATTERNS + tuple(extra_patterns)
+    groups = ([p for p in patterns if p.startswith('^')], [p for p in patterns if not p.startswith('^')])
+    searches = [re.compile("|".join(f"(?:{p})" for p in group)).search for group in groups if group]
+    if len(searches) == 1:
+        return searches[0]
+    anchored, anywhere = searches
+    return lambda line: anchored(line) or anywhere(line)
+
+
+def _edge_indices(lines, edge_lines):
+    """
+    페이지의 위/아래 edge_lines 개의 비어 있지 않은 줄(머리글·바닥글 후보) 위치
+    """
+    head, tail = [], []
+    for i in range(len(lines)):
+        if len(head) >= edge_lines:
+            break
+        if lines[i].strip():
+            head.append(i)
+    for i in range(len(lines) - 1, head[-1] if head else -1, -1):
+        if len(tail) >= edge_lines:
+            break
+        if lines[i].strip():
+            tail.append(i)
+    return head + tail
+
+
+def _edge_candidate(line):
+    """
+    머리글·바닥글 후보가 될 수 있는 줄(앞뒤 공백 제거). 제목/문제 번호 줄과 글자가 거의 없는 줄은 제외(None)
+    """
+    line = line.strip()
+    if _HEADING_RE.match(line) or _QUESTION_RE.search(line) or len(_NON_WORD_RE.sub('', line)) < 3:
+        return None
+    return line
+
+
+def iter_clean_lines(pages, skip_patterns=(), detect_repeated=True, sample_pages=5, edge_lines=2, min_repeats=3):
+    """
+    페이지 텍스트를 순서대로 받아 정리된 줄을 하나씩 돌려줍니다.
+    - 불필요한 줄(페이지 번호 등)을 건너뛰고, 문단이 시작될 때마다 빈 줄을 넣습니다.
+    - detect_repeated 가 켜져 있으면 앞쪽 sample_pages 페이지만 잠시 모아, 페이지 위/아래에서
+      표본 페이지 과반(최소 min_repeats 페이지)에 글자 그대로 반복되는 줄(과목명, 시험명 등)을 모든 페이지에서 제거합니다.
+      제목·문제 번호 줄은 반복되더라도 지우지 않습니다.
+    """
+    is_skipped = compile_skip_patterns(tuple(skip_patterns))
+    pages = iter(pages)
+
+    repeated = set()
+    buffered = []
+    if detect_repeated:
+        counts = Counter()
+        for page in pages:
+            lines = page.split('\n')
+            buffered.append(lines)
+            counts.update({_edge_candidate(lines[i]) for i in _edge_indices(lines, edge_lines)} - {None})
+            if len(buffered) >= sample_pages:
+                break
+        threshold = max(min_repeats, len(buffered) // 2 + 1)
+        repeated = {line for line, n in counts.items() if n >= threshold}
+
+    def all_pages():
+        yield from buffered
+        for page in pages:
+            yield page.split('\n')
+
     prev_blank = True  # 문단 시작 여부 체크용
+    for lines in all_pages():
+        # 반복 머리글/바닥글은 페이지 위/아래 줄만 확인
+        drop = {i for i in _edge_indices(lines, edge_lines)
+                if lines[i].strip() in repeated} if repeated else ()
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                prev_blank = True
+                continue
+            # 스킵할 줄: 페이지 번호, 학번 줄, 반복 머리글/바닥글 등
+            if i in drop or is_skipped(line):
+                continue
 
-    for line in lines:
-        line = line.strip()
-        # 스킵할 줄: 페이지 번호, 과제 제목, 학번 줄 등
-        if re.search(r'DIGB226|Final Take-Home Exam|^\s*-\s*\d+\s*-$', line):
-            continue
-        if re.search(r'^\d{9,10}\s*[\uAC00-\uD7A3]+$', line):
-            continue
-        if not line:
-            prev_blank = True
-            continue
+            # 새 문단 시작 시 빈 줄 추가
+            if prev_blank:
+                yield ""
+            yield line
+            prev_blank = False
 
-        # 새 문단 시작 시 빈 줄 추가
-        if prev_blank:
-            cleaned.append("")  # 빈 줄 넣기
-        cleaned.append(line)
-        prev_blank = False
 
-    return "\n".join(cleaned)
+def clean_pages(pages, skip_patterns=(), detect_repeated=True):
+    """
+    페이지 단위 텍스트(iter_pdf_pages 결과 등)를 정리된 하나의 텍스트로 만듭니다.
+    """
+    return "\n".join(iter_clean_lines(pages, skip_patterns, detect_repeated))
+
+
+def clean_text_postprocess(text, skip_patterns=()):
+    """
+    PDF에서 추출한 텍스트를 문단별로 정리하고 불필요한 줄을 제거합니다.
+    (페이지 구분이 없는 텍스트이므로 반복 머리글 감지는 하지 않습니다.)
+    """
+    return "\n".join(iter_clean_lines([text], skip_patterns, detect_repeated=False))
+
 
 def apply_indentation(text):
     """
     문단에 들여쓰기 및 스타일 적용하여 HTML 렌더링용으로 변환
+    (STEP 4는 채점 결과를 만들 때 한 번만 변환해 저장소에 보관합니다.)
     """
     lines = text.split('\n')
     html_lines = []
@@ -42,7 +145,7 @@ def apply_indentation(text):
         if not line:
             html_lines.append("<br>")
             continue
-        if re.match(r'^\d+(\.\d+)*\s', line):  # 1. / 1.1 / 2. 같은 제목
+        if _HEADING_RE.match(line):  # 1. / 1.1 / 2. 같은 제목
             html_lines.append(f"<p style='margin-bottom: 5px; font-weight: bold;'>{html.escape(line)}</p>")
         else:
             html_lines.append(f"<p style='padding-left: 20px; margin: 0;'>{html.escape(line)}</p>")
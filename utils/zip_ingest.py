@@ -0,0 +1,134 @@
+# zip_ingest.py
+# 이 파일은 LMS에서 내려받은 제출물 ZIP 파일을 압축 해제 없이 읽고,
+# 학생 명단(CSV)과 학번/이름 인덱스로 제출 파일을 학생에게 연결하는 유틸 함수입니다.
+
+import io
+import os
+import re
+import zipfile
+import urllib.parse
+
+import pandas as pd
+
+from utils.file_info import extract_info_from_filename
+
+_ID_RE = re.compile(r'\d{6,10}')
+_NAME_RE = re.compile(r'[가-힣]{2,5}')
+
+ID_COLUMNS = ("학번", "id", "student_id", "student id", "학생번호", "사용자명", "username")
+NAME_COLUMNS = ("이름", "성명", "name", "student_name", "student name", "full name")
+
+
+def _entry_name(info: zipfile.ZipInfo) -> str:
+    """
+    ZIP 항목의 파일명을 복원합니다.
+    UTF-8 플래그가 없는 항목(윈도우 탐색기/일부 LMS)은 cp437 로 읽히므로 cp949 로 다시 디코딩합니다.
+    """
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("cp949")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def iter_zip_pdfs(zip_file):
+    """
+    ZIP 파일 안의 PDF 항목을 하나씩 (파일명, 바이트) 로 돌려줍니다.
+    디스크에 압축을 풀지 않고 항목 단위로만 메모리에 읽습니다. (macOS 메타데이터 폴더는 제외)
+    """
+    with zipfile.ZipFile(zip_file) as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+            name = _entry_name(info)
+            if name.startswith("__MACOSX/") or os.path.basename(name).startswith("._"):
+                continue
+            if not name.lower().endswith(".pdf"):
+                continue
+            with zf.open(info) as entry:
+                yield name, entry.read()
+
+
+def _find_column(columns, candidates):
+    lowered = {str(c).strip().lower(): c for c in columns}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    return None
+
+
+class RosterIndex:
+    """
+    학생 명단의 학번 → 학생, 이름 → 학생 목록 해시 인덱스.
+    """
+
+    def __init__(self, students):
+        self.students = students  # [(이름, 학번)]
+        self.by_id = {}
+        self.by_name = {}
+        for name, sid in students:
+            self.by_id[sid] = (name, sid)
+            self.by_name.setdefault(name, []).append((name, sid))
+
+    def match(self, filename):
+        """
+        파일 경로(폴더명 포함)에서 명단의 학생을 찾습니다. 학번이 우선이며,
+        학번이 없으면 명단에서 한 명으로만 특정되는 이름을 사용합니다. 찾지 못하면 None.
+        """
+        decoded = urllib.parse.unquote(filename)
+        for sid in _ID_RE.findall(decoded):
+            if sid in self.by_id:
+                return self.by_id[sid]
+        for name in _NAME_RE.findall(decoded):
+            candidates = self.by_name.get(name)
+            if candidates and len(candidates) == 1:
+                return candidates[0]
+        return None
+
+    def identify(self, filename):
+        """
+        명단에서 학생을 찾고, 없으면 파일명 규칙(extract_info_from_filename)으로 대체합니다.
+        """
+        return self.match(filename) or extract_info_from_filename(filename)
+
+
+def load_roster(csv_file):
+    """
+    학생 명단 CSV 를 읽어 RosterIndex 를 만듭니다. (UTF-8 / CP949 모두 지원)
+    학번 열(학번, id, student_id ...)과 이름 열(이름, 성명, name ...)을 자동으로 찾습니다.
+    """
+    raw = csv_file.read() if hasattr(csv_file, "read") else open(csv_file, "rb").read()
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            df = pd.read_csv(io.BytesIO(raw), dtype=str, encoding=encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("명단 CSV 인코딩을 인식할 수 없습니다. UTF-8 또는 CP949로 저장해주세요.")
+
+    id_col, name_col = _find_column(df.columns, ID_COLUMNS), _find_column(df.columns, NAME_COLUMNS)
+    if id_col is None or name_col is None:
+        raise ValueError(f"명단에서 학번/이름 열을 찾을 수 없습니다. (열 목록: {', '.join(map(str, df.columns))})")
+
+    df = df[[name_col, id_col]].dropna()
+    students = list(zip(df[name_col].str.strip(), df[id_col].str.strip()))
+    return RosterIndex(students)
+
+
+def match_report(filenames, roster):
+    """
+    제출 파일과 명단의 매칭 결과를 정리합니다.
+    matched: {학번: [파일명]}, unmatched: [파일명], duplicates: {학번: [파일명, ...]}, missing: [(이름, 학번)]
+    """
+    matched, unmatched = {}, []
+    for filename in filenames:
+        student = roster.match(filename)
+        if student is None:
+            unmatched.append(filename)
+        else:
+            matched.setdefault(student[1], []).append(filename)
+    duplicates = {sid: files for sid, files in matched.items() if len(files) > 1}
+    missing = [s for s in roster.students if s[1] not in matched]
+    return {"matched": matched, "unmatched": unmatched, "duplicates": duplicates, "missing": missing}